@@ -17,9 +17,10 @@ from neutron_clustering import NeutronClustering
 # data from LArSoft is stored one directory up from the
 # root directory.
 input_dir   = "../../neutron_data/"
-input_file  = "protodune_cosmic_voxels_0.root"
+input_file  = "protodune_cosmic_voxels_0"
 neutron_clustering = NeutronClustering(
-    input_file = input_dir + input_file
+    name       = input_file,
+    input_file = input_dir + input_file + ".root"
 )
 
 # cluster on neutron truth data
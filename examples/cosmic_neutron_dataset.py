@@ -24,71 +24,28 @@ dataset = NeutronCosmicDataset(
     load_mc_edeps   = True,
     load_mc_voxels  = True,
     load_reco_edeps = False,
+    entry_start     = None,     # set to load a chunk of the file,
+    entry_stop      = None,     # e.g. (0, 100000) for the first 100k events
 )
-# Various plotting functions are shown below.
-for event in range(dataset.num_neutron_events):
-    dataset.plot_mc_voxel_locations(
-        event           = event,
+# Various plotting functions are shown below.  Events are streamed
+# through the file in chunks so that memory stays bounded regardless
+# of the number of events in the input.  The yielded batches hold
+# global event indices and the plot files are keyed on them, so each
+# chunk produces its own output; note that after the loop the
+# dataset's voxel arrays hold only the final chunk.
+for event_batch in dataset.iter_events(step_size="100 MB"):
+    dataset.plot_mc_voxel_locations_batch(
+        events          = event_batch,
         plot_type       = '3d',
+    )
+    # render all eight capture/edep projections for the first
+    # event of the batch in a single figure
+    dataset.plot_all_projections(
+        event           = event_batch[0],
         show_active_tpc = True,
-        show_cryostat   = True,   
+        show_cryostat   = True,
+        title           = 'Example MC Projections (ProtoDUNE)',
     )
-    # dataset.plot_capture_locations(
-    #     event           = event,
-    #     plot_type       = '3d',
-    #     show_active_tpc = True,
-    #     show_cryostat   = True,
-    #     title           = 'Example Capture Locations (ProtoDUNE)',
-    # )
-    # dataset.plot_capture_locations(
-    #     event           = event,
-    #     plot_type       = 'xy',
-    #     show_active_tpc = True,
-    #     show_cryostat   = True,
-    #     title           = 'Example Capture Locations (ProtoDUNE)',
-    # )
-    # dataset.plot_capture_locations(
-    #     event           = event,
-    #     plot_type       = 'yz',
-    #     show_active_tpc = True,
-    #     show_cryostat   = True,
-    #     title           = 'Example Capture Locations (ProtoDUNE)',
-    # )
-    # dataset.plot_capture_locations(
-    #     event           = event,
-    #     plot_type       = 'xz',
-    #     show_active_tpc = True,
-    #     show_cryostat   = True,
-    #     title           = 'Example Capture Locations (ProtoDUNE)',
-    # )
-    # dataset.plot_mc_edep_locations(
-    #     event           = event,
-    #     plot_type       = '3d',
-    #     show_active_tpc = True,
-    #     show_cryostat   = True,
-    #     title           = 'Example Capture Locations (ProtoDUNE)',
-    # )
-    # dataset.plot_mc_edep_locations(
-    #     event           = event,
-    #     plot_type       = 'xy',
-    #     show_active_tpc = True,
-    #     show_cryostat   = True,
-    #     title           = 'Example Capture Locations (ProtoDUNE)',
-    # )
-    # dataset.plot_mc_edep_locations(
-    #     event           = event,
-    #     plot_type       = 'xz',
-    #     show_active_tpc = True,
-    #     show_cryostat   = True,
-    #     title           = 'Example Capture Locations (ProtoDUNE)',
-    # )
-    # dataset.plot_mc_edep_locations(
-    #     event           = event,
-    #     plot_type       = 'yz',
-    #     show_active_tpc = True,
-    #     show_cryostat   = True,
-    #     title           = 'Example Capture Locations (ProtoDUNE)',
-    # )
 # plot the density of captures along a particular
 # 2d plane
 dataset.plot_capture_density(
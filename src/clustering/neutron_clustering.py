@@ -4,35 +4,141 @@ Collection of clustering functions for neutron calibration sims/data
 # imports
 import numpy as np
 import scipy as sp
+from scipy.spatial import distance
+from scipy.spatial import cKDTree
 import matplotlib.pyplot as plt
 import pandas as pd
 import math
 import csv
 from sklearn import cluster
 from sklearn import metrics
+from sklearn import neighbors
+from joblib import Parallel, delayed
 import seaborn as sns
 import uproot
 import os
 import sys
 sys.path.append("../")
-from neutron_dataset import NeutronCosmicDataset
+from neutron_dataset import NeutronCosmicDataset, group_sum
 from parameters import *
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+try:
+    import awkward as ak
+except ImportError:
+    ak = None
+
+def _union_find(pairs, num_points):
+    # connected components over an edge list via union-find with path
+    # halving; returns the root of each point
+    parent = np.arange(num_points, dtype=np.int64)
+    for k in range(len(pairs)):
+        a = pairs[k,0]
+        b = pairs[k,1]
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        while parent[b] != b:
+            parent[b] = parent[parent[b]]
+            b = parent[b]
+        if a < b:
+            parent[b] = a
+        elif b < a:
+            parent[a] = b
+    for i in range(num_points):
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        parent[i] = root
+    return parent
+
+if njit is not None:
+    _union_find = njit(cache=True)(_union_find)
+
+def _kdtree_labels(pos, eps, min_samples=1, tree=None):
+    """
+    DBSCAN-style labels from a radius graph: one cKDTree pair query
+    within eps, union-find over the pairs, and components smaller than
+    min_samples marked as noise (-1).  For small events this avoids the
+    generic DBSCAN machinery rebuilt on every fit; a prebuilt tree can
+    be passed in to amortize construction across queries.
+    """
+    if tree is None:
+        tree = cKDTree(pos)
+    pairs = tree.query_pairs(eps, output_type='ndarray')
+    roots = _union_find(pairs, len(pos))
+    unique_roots, labels, counts = np.unique(
+        roots, return_inverse=True, return_counts=True
+    )
+    labels = labels.astype(np.int64)
+    labels[(counts[labels] < min_samples)] = -1
+    return labels
 
 def euclidean_distance(p1, p2):
-    if (len(p1) != len(p2)):
-        raise ValueError(f"Tried to compute Euclidean distance between two points with different dimension ({len(p1)},{len(p2)})!")
-    dist = [(a - b)**2 for a, b in zip(p1, p2)]
-    dist = math.sqrt(sum(dist))
-    return dist
+    a = np.asarray(p1)
+    b = np.asarray(p2)
+    if (a.shape != b.shape):
+        raise ValueError(f"Tried to compute Euclidean distance between two points with different dimension ({a.shape},{b.shape})!")
+    # single C-level norm rather than a per-component Python loop
+    return float(np.linalg.norm(a - b))
+
+def _make_clusterer(alg, params):
+    if alg == 'affinity':
+        return cluster.AffinityPropagation(**params)
+    elif alg == 'mean_shift':
+        return cluster.MeanShift(**params)
+    elif alg == 'optics':
+        return cluster.OPTICS(**params)
+    elif alg == 'gaussian':
+        return cluster.GaussianMixture(**params)
+    return cluster.DBSCAN(**params)
+
+def _fit_one(pos, alg, params):
+    """
+    Fit one event's positions; lives at module level so joblib can
+    pickle it, and constructs the clusterer inside the worker.
+    """
+    if alg == 'kdtree':
+        return _kdtree_labels(pos, params['eps'], params.get('min_samples', 1))
+    clusterer = _make_clusterer(alg, params)
+    clusterer.fit(pos)
+    if alg == 'gaussian':
+        return clusterer.predict(pos)
+    return clusterer.labels_
+
+def _cluster_and_score(eps, min_samples, event_points, event_labels, event_graphs=None):
+    """
+    Cluster every event at one eps value and return the averaged scores;
+    pure over its arguments so joblib can sweep eps values in parallel
+    workers.  When the per-event radius graphs are provided, DBSCAN runs
+    on the precomputed sparse distances instead of rebuilding a spatial
+    index for every eps.
+    """
+    sums = np.zeros(6)
+    for ii, (pos, labels) in enumerate(zip(event_points, event_labels)):
+        if event_graphs is not None:
+            pred = cluster.DBSCAN(
+                eps=eps, min_samples=min_samples, metric='precomputed'
+            ).fit(event_graphs[ii]).labels_
+        else:
+            pred = _fit_one(pos, 'dbscan', {'eps': eps, 'min_samples': min_samples})
+        distances = metrics.pairwise_distances(pos).astype(np.float32)
+        sums += (
+            metrics.homogeneity_score(labels, pred),
+            metrics.completeness_score(labels, pred),
+            metrics.v_measure_score(labels, pred),
+            metrics.adjusted_rand_score(labels, pred),
+            metrics.adjusted_mutual_info_score(labels, pred),
+            metrics.silhouette_score(distances, pred, metric='precomputed'),
+        )
+    return [eps] + list(sums / len(event_points))
 
 def find_largest_distance(pos):
-    dists = []
-    for p in pos:
-        for q in pos:
-            dists.append(
-                euclidean_distance(p,q)
-            )
-    return max(dists)
+    # pdist evaluates only the upper triangle in a vectorized C kernel,
+    # rather than N^2 Python-level distance calls
+    return float(distance.pdist(np.asarray(pos)).max())
 
 class NeutronClustering(NeutronCosmicDataset):
     """
@@ -41,12 +147,151 @@ class NeutronClustering(NeutronCosmicDataset):
     as follows:
     """
     def __init__(self,
+        name,
         input_file,
         unet_file:  str='',
+        use_cache:  bool=True,
+        cache_format:   str='npz',
     ):
-        super(NeutronClustering, self).__init__(input_file)
+        super(NeutronClustering, self).__init__(name, input_file)
         if not os.path.isdir("clustering/"):
             os.mkdir("clustering/")
+        if cache_format not in ['npz', 'parquet']:
+            self.logger.warning(f"Requested cache format '{cache_format}' not allowed, using 'npz'.")
+            cache_format = 'npz'
+        # SoA layout: the neutron-ancestored deposits are kept as one flat
+        # contiguous array per component with per-event offsets, so
+        # whole-dataset reductions stream sequentially and per-event views
+        # are O(1) slices; (N,3) matrices are only stacked lazily for the
+        # sklearn calls that need them.  The flat arrays are cached on
+        # disk keyed on the source file's mtime and size, so repeated
+        # instantiations skip the per-event masking passes entirely.
+        cache_path = self._edep_cache_path(input_file, cache_format)
+        if use_cache and os.path.isfile(cache_path):
+            self.logger.info(f"Loading preprocessed edep arrays from {cache_path}.")
+            if cache_format == 'parquet':
+                # a memory-mapped parquet read decodes an order of
+                # magnitude faster than re-parsing the ROOT baskets
+                try:
+                    import pyarrow.parquet as pq
+                except ImportError:
+                    self.logger.error("The 'pyarrow' package is required for cache_format='parquet' but is not installed!")
+                    raise ImportError("The 'pyarrow' package is required for cache_format='parquet' but is not installed!")
+                table = pq.read_table(cache_path, memory_map=True)
+                self.num_events = int(table.schema.metadata[b'num_events'])
+                counts = np.bincount(
+                    table.column('event_id').to_numpy(),
+                    minlength=self.num_events,
+                )
+                self.edep_event_offsets = np.zeros(self.num_events + 1, dtype=np.int64)
+                np.cumsum(counts, out=self.edep_event_offsets[1:])
+                self.edep_x = table.column('x').to_numpy()
+                self.edep_y = table.column('y').to_numpy()
+                self.edep_z = table.column('z').to_numpy()
+                flat_energy      = table.column('energy').to_numpy()
+                flat_electrons   = table.column('num_electrons').to_numpy()
+                flat_neutron_ids = table.column('neutron_ids').to_numpy()
+                flat_gamma_ids   = table.column('gamma_ids').to_numpy()
+            else:
+                cached = np.load(cache_path)
+                self.edep_event_offsets = cached['offsets']
+                self.edep_x = cached['x']
+                self.edep_y = cached['y']
+                self.edep_z = cached['z']
+                flat_energy      = cached['energy']
+                flat_electrons   = cached['num_electrons']
+                flat_neutron_ids = cached['neutron_ids']
+                flat_gamma_ids   = cached['gamma_ids']
+                # the event count comes from the cached offsets so a cache
+                # hit never touches the (lazily loaded) edep branches at all
+                self.num_events = len(self.edep_event_offsets) - 1
+        else:
+            self.num_events = self.num_mc_edep_events
+            counts = np.zeros(self.num_events, dtype=np.int64)
+            x_list, y_list, z_list = [], [], []
+            energy_list, electrons_list = [], []
+            neutron_ids_list, gamma_ids_list = [], []
+            for jj in range(self.num_events):
+                neutron = (np.asarray(self.mc_edeps['pdg'][jj]) == 2112)
+                x_list.append(np.asarray(self.mc_edeps['edep_x'][jj], dtype=np.float32)[neutron])
+                y_list.append(np.asarray(self.mc_edeps['edep_y'][jj], dtype=np.float32)[neutron])
+                z_list.append(np.asarray(self.mc_edeps['edep_z'][jj], dtype=np.float32)[neutron])
+                # mm-scale positions and MeV-scale energies are well inside
+                # float32 precision, and halving the bytes halves the cache
+                # traffic in the distance kernels that dominate clustering
+                energy_list.append(np.asarray(self.mc_edeps['energy'][jj], dtype=np.float32)[neutron])
+                electrons_list.append(np.asarray(self.mc_edeps['num_electrons'][jj], dtype=np.float32)[neutron])
+                neutron_ids_list.append(np.asarray(self.mc_edeps['ancestor_id'][jj])[neutron])
+                # the extraction stores the depositing track rather than a
+                # dedicated gamma id, so gamma-level grouping uses track_id
+                gamma_ids_list.append(np.asarray(self.mc_edeps['track_id'][jj])[neutron])
+                counts[jj] = len(x_list[-1])
+            self.edep_event_offsets = np.zeros(self.num_events + 1, dtype=np.int64)
+            np.cumsum(counts, out=self.edep_event_offsets[1:])
+            self.edep_x = np.concatenate(x_list)
+            self.edep_y = np.concatenate(y_list)
+            self.edep_z = np.concatenate(z_list)
+            flat_energy      = np.concatenate(energy_list)
+            flat_electrons   = np.concatenate(electrons_list)
+            flat_neutron_ids = np.concatenate(neutron_ids_list)
+            flat_gamma_ids   = np.concatenate(gamma_ids_list)
+            if use_cache:
+                if cache_format == 'parquet':
+                    try:
+                        import pyarrow as pa
+                        import pyarrow.parquet as pq
+                    except ImportError:
+                        self.logger.error("The 'pyarrow' package is required for cache_format='parquet' but is not installed!")
+                        raise ImportError("The 'pyarrow' package is required for cache_format='parquet' but is not installed!")
+                    # one row per deposit with an event_id column; the
+                    # offsets are rebuilt from it on load, and the true
+                    # event count rides in the schema metadata so empty
+                    # trailing events survive the round trip
+                    table = pa.table({
+                        'event_id': np.repeat(np.arange(self.num_events), counts),
+                        'x':        self.edep_x,
+                        'y':        self.edep_y,
+                        'z':        self.edep_z,
+                        'energy':   flat_energy,
+                        'num_electrons': flat_electrons,
+                        'neutron_ids':   flat_neutron_ids,
+                        'gamma_ids':     flat_gamma_ids,
+                    }).replace_schema_metadata({'num_events': str(self.num_events)})
+                    pq.write_table(table, cache_path)
+                else:
+                    np.savez(cache_path,
+                        offsets= self.edep_event_offsets,
+                        x      = self.edep_x,
+                        y      = self.edep_y,
+                        z      = self.edep_z,
+                        energy = flat_energy,
+                        num_electrons= flat_electrons,
+                        neutron_ids  = flat_neutron_ids,
+                        gamma_ids    = flat_gamma_ids,
+                    )
+                self.logger.info(f"Saved preprocessed edep arrays to {cache_path}.")
+        # per-event object arrays of views into the flat arrays, so the
+        # event-indexed analysis methods keep working without copies
+        self.edep_energy        = self._event_views(flat_energy)
+        self.edep_num_electrons = self._event_views(flat_electrons)
+        self.edep_neutron_ids   = self._event_views(flat_neutron_ids)
+        self.edep_gamma_ids     = self._event_views(flat_gamma_ids)
+        # one flat (sum N_i, 3) float32 position buffer shared by every
+        # per-event view; with awkward installed the jagged positions are
+        # offsets into that buffer rather than an object array of Python
+        # references, so bulk ops (flatten, concat, means) stay C-level
+        self._flat_positions = np.ascontiguousarray(
+            np.column_stack((self.edep_x, self.edep_y, self.edep_z)),
+            dtype=np.float32,
+        )
+        if ak is not None:
+            self.edep_positions = ak.unflatten(
+                self._flat_positions, np.diff(self.edep_event_offsets)
+            )
+        else:
+            self.edep_positions = self._event_views(self._flat_positions)
+        # lazy per-event cache for the kd-trees built over the positions
+        self._trees = {}
         self.truth_cluster_predictions = []
         self.truth_cluster_scores = {
             'homogeneity':          [],
@@ -85,15 +330,64 @@ class NeutronClustering(NeutronCosmicDataset):
         }
         self.cluster_voxels_spectrum = []
 
+    def _edep_cache_path(self,
+        input_file,
+        cache_format:   str='npz',
+    ):
+        # keyed on the source file's mtime and size, so a regenerated
+        # ROOT file invalidates the cached arrays
+        stat = os.stat(input_file)
+        return f"clustering/{self.name}_edeps_{int(stat.st_mtime)}_{stat.st_size}.{cache_format}"
+
+    def _event_views(self,
+        flat,
+    ):
+        # object array of per-event slices into a flat component array
+        views = np.empty(self.num_events, dtype=object)
+        for jj in range(self.num_events):
+            views[jj] = flat[self.edep_event_offsets[jj]:self.edep_event_offsets[jj+1]]
+        return views
+
+    def event_positions(self,
+        event:  int,
+    ):
+        """
+        One event's C-contiguous (N,3) float32 position matrix, sliced
+        zero-copy out of the shared flat buffer so clustering and
+        silhouette scoring never materialize their own copies.
+        """
+        begin = self.edep_event_offsets[event]
+        end   = self.edep_event_offsets[event+1]
+        return self._flat_positions[begin:end]
+
+    def event_tree(self,
+        event:  int,
+    ):
+        """
+        cKDTree over the event's positions, built lazily and reused so
+        repeated neighbor queries (e.g. eps sweeps) pay the tree
+        construction only once per event.
+        """
+        if event not in self._trees:
+            self._trees[event] = cKDTree(self.event_positions(event))
+        return self._trees[event]
+
     # functions involving MC truth clustering
     def cluster_truth(self,
         level:  str='neutron',
         alg:    str='dbscan',
         params: dict={'eps': 100.,'min_samples': 6},
+        event_points:   list=None,
+        use_gpu:    bool=False,
     ):
         """
         Function for running clustering algorithms on events.
-        The level can be ['neutron','gamma']
+        The level can be ['neutron','gamma'].  Callers sweeping
+        parameters can pass the pre-extracted event_points so repeated
+        calls do no per-event marshaling at all.  With use_gpu the
+        per-event DBSCAN fits run through cuML on the GPU; the event
+        arrays are moved to the device once up front so the loop only
+        launches kernels.
         """
         if level not in ['neutron', 'gamma']:
             self.logger.warning(f"Requested cluster level by '{level}' not allowed, using 'neutron'.")
@@ -107,22 +401,50 @@ class NeutronClustering(NeutronCosmicDataset):
             if item not in cluster_params[alg]:
                 self.logger.error(f"Unrecognized parameter {item} for algorithm {alg}! Available parameters are {cluster_params[alg]}.")
                 raise ValueError(f"Unrecognized parameter {item} for algorithm {alg}! Available parameters are {cluster_params[alg]}.")
-        # run the clustering algorithm
+        # run the clustering algorithm; events are independent, so the
+        # per-event fits run across all cores in worker processes
         self.logger.info(f"Attempting to run clustering algorithm {alg} with parameters {params}.")
-        if alg == 'affinity':
-            clusterer = cluster.AffinityPropagation(**params)
-        elif alg == 'mean_shift':
-            clusterer = cluster.MeanShift(**params)
-        elif alg == 'optics':
-            clusterer = cluster.OPTICS(**params)
-        elif alg == 'gaussian':
-            clusterer = cluster.GaussianMixture(**params)
+        if event_points is None:
+            event_points = [self.event_positions(event) for event in range(self.num_events)]
+        if use_gpu:
+            if alg not in ['dbscan', 'kdtree']:
+                self.logger.warning(f"GPU clustering only implemented for 'dbscan', ignoring use_gpu for '{alg}'.")
+            else:
+                try:
+                    import cupy
+                    from cuml.cluster import DBSCAN as cuDBSCAN
+                except ImportError:
+                    self.logger.error("The 'cuml' and 'cupy' packages are required for use_gpu but are not installed!")
+                    raise ImportError("The 'cuml' and 'cupy' packages are required for use_gpu but are not installed!")
+                # one bulk host-to-device pass; the fit loop then only
+                # launches kernels on resident device arrays
+                device_points = [
+                    cupy.asarray(pos, dtype=cupy.float32) for pos in event_points
+                ]
+                clusterer = cuDBSCAN(
+                    eps=params['eps'], min_samples=params.get('min_samples', 1)
+                )
+                self.truth_cluster_predictions = [
+                    cupy.asnumpy(clusterer.fit_predict(pos)) for pos in device_points
+                ]
+                return
+        if alg == 'kdtree':
+            # run serially against the cached per-event trees, so sweeps
+            # over eps re-query the same trees instead of rebuilding them
+            self.truth_cluster_predictions = [
+                _kdtree_labels(
+                    event_points[event],
+                    params['eps'],
+                    params.get('min_samples', 1),
+                    tree=self.event_tree(event),
+                )
+                for event in range(self.num_events)
+            ]
         else:
-            clusterer = cluster.DBSCAN(**params)
-        self.truth_cluster_predictions = []
-        for pos in self.neutron_edep_positions:
-            clusterer.fit(pos)
-            self.truth_cluster_predictions.append(clusterer.labels_)
+            self.truth_cluster_predictions = Parallel(n_jobs=-1, backend="loky")(
+                delayed(_fit_one)(pos, alg, params)
+                for pos in event_points
+            )
     
     # functions involving MC truth clustering
     def cluster_truth_voxels(self,
@@ -144,20 +466,14 @@ class NeutronClustering(NeutronCosmicDataset):
                 raise ValueError(f"Unrecognized parameter {item} for algorithm {alg}! Available parameters are {cluster_params[alg]}.")
         # run the clustering algorithm
         self.logger.info(f"Attempting to run clustering algorithm {alg} with parameters {params}.")
-        if alg == 'affinity':
-            clusterer = cluster.AffinityPropagation(**params)
-        elif alg == 'mean_shift':
-            clusterer = cluster.MeanShift(**params)
-        elif alg == 'optics':
-            clusterer = cluster.OPTICS(**params)
-        elif alg == 'gaussian':
-            clusterer = cluster.GaussianMixture(**params)
-        else:
-            clusterer = cluster.DBSCAN(**params)
-        self.truth_cluster_predictions = []
-        for ii, coords in self.voxel_coords:
-            truth_coords = coords[(self.voxel_labels[ii] == 0)]
-            clusterer.fit(truth_coords)
+        clusterer = _make_clusterer(alg, params)
+        self.truth_voxels_cluster_predictions = []
+        for event in range(self.num_mc_voxel_events):
+            coords, labels, energy = self.event_voxels(event)
+            truth_coords = coords[(labels == 0)]
+            # guarantee a C-contiguous float array so sklearn does not
+            # make a silent copy of the coordinates on every fit
+            clusterer.fit(np.ascontiguousarray(truth_coords, dtype=np.float32))
             self.truth_voxels_cluster_predictions.append(clusterer.labels_)
 
     def calc_truth_scores(self,
@@ -186,9 +502,16 @@ class NeutronClustering(NeutronCosmicDataset):
             self.truth_cluster_scores['v-measure'].append(metrics.v_measure_score(labels[ii], pred))
             self.truth_cluster_scores['adjusted_rand_index'].append(metrics.adjusted_rand_score(labels[ii], pred))
             self.truth_cluster_scores['adjusted_mutual_info'].append(metrics.adjusted_mutual_info_score(labels[ii], pred))
-            self.truth_cluster_scores['silhouette'].append(metrics.silhouette_score(self.neutron_edep_positions[ii], pred))
+            # hand silhouette a precomputed distance matrix so it does
+            # not recompute the pairwise distances internally
+            distances = metrics.pairwise_distances(
+                self.event_positions(ii), n_jobs=-1
+            ).astype(np.float32)
+            self.truth_cluster_scores['silhouette'].append(
+                metrics.silhouette_score(distances, pred, metric='precomputed')
+            )
         for item in self.truth_cluster_scores.keys():
-            self.truth_avg_cluster_scores[item] = sum(self.truth_cluster_scores[item]) / len(labels)
+            self.truth_avg_cluster_scores[item] = np.sum(self.truth_cluster_scores[item]) / len(labels)
         self.logger.info(f"Calculated average scores {self.truth_avg_cluster_scores} for level: {level}.")
         return self.truth_avg_cluster_scores
     
@@ -198,25 +521,43 @@ class NeutronClustering(NeutronCosmicDataset):
         if self.truth_voxels_cluster_predictions == []:
             self.logger.error("No predictions have been made, need to run clustering algorithm first!")
             raise ValueError("No predictions have been made, need to run clustering algorithm first!")
-        if len(self.truth_voxels_cluster_predictions) != self.num_events:
-            self.logger.error(f"Only {len(self.truth_voxels_cluster_predictions)} predictions but {self.num_events} events!")
-            raise ValueError(f"Only {len(self.truth_voxels_cluster_predictions)} predictions but {self.num_events} events!")
+        if len(self.truth_voxels_cluster_predictions) != self.num_mc_voxel_events:
+            self.logger.error(f"Only {len(self.truth_voxels_cluster_predictions)} predictions but {self.num_mc_voxel_events} events!")
+            raise ValueError(f"Only {len(self.truth_voxels_cluster_predictions)} predictions but {self.num_mc_voxel_events} events!")
         # clear the scores
         for item in self.truth_voxels_cluster_scores.keys():
             self.truth_voxels_cluster_scores[item] = []
         
         self.logger.info(f"Attempting to calculate scores on cluster voxel predictions.")
         for ii, pred in enumerate(self.truth_voxels_cluster_predictions):
-            self.truth_cluster_scores['homogeneity'].append(metrics.homogeneity_score(self.voxel_labels[ii], pred))
-            self.truth_cluster_scores['completeness'].append(metrics.completeness_score(self.voxel_labels[ii], pred))
-            self.truth_cluster_scores['v-measure'].append(metrics.v_measure_score(self.voxel_labels[ii], pred))
-            self.truth_cluster_scores['adjusted_rand_index'].append(metrics.adjusted_rand_score(self.voxel_labels[ii], pred))
-            self.truth_cluster_scores['adjusted_mutual_info'].append(metrics.adjusted_mutual_info_score(self.voxel_labels[ii], pred))
-            self.truth_cluster_scores['silhouette'].append(metrics.silhouette_score(self.neutron_edep_positions[ii], pred))
-        for item in self.truth_cluster_scores.keys():
-            self.truth_avg_cluster_scores[item] = sum(self.truth_cluster_scores[item]) / len(self.voxel_labels)
-        self.logger.info(f"Calculated average scores {self.truth_avg_cluster_scores} for level: {level}.")
-        return self.truth_avg_cluster_scores
+            # the predictions cover the truth voxels only, so the labels
+            # are restricted to the same subset that was clustered
+            coords, voxel_labels, energy = self.event_voxels(ii)
+            truth_mask = (voxel_labels == 0)
+            truth_labels = voxel_labels[truth_mask]
+            self.truth_voxels_cluster_scores['homogeneity'].append(metrics.homogeneity_score(truth_labels, pred))
+            self.truth_voxels_cluster_scores['completeness'].append(metrics.completeness_score(truth_labels, pred))
+            self.truth_voxels_cluster_scores['v-measure'].append(metrics.v_measure_score(truth_labels, pred))
+            self.truth_voxels_cluster_scores['adjusted_rand_index'].append(metrics.adjusted_rand_score(truth_labels, pred))
+            self.truth_voxels_cluster_scores['adjusted_mutual_info'].append(metrics.adjusted_mutual_info_score(truth_labels, pred))
+            # hand silhouette a precomputed distance matrix over the same
+            # truth voxels that were clustered
+            truth_coords = np.ascontiguousarray(
+                coords[truth_mask], dtype=np.float32
+            )
+            distances = metrics.pairwise_distances(
+                truth_coords, n_jobs=-1
+            ).astype(np.float32)
+            self.truth_voxels_cluster_scores['silhouette'].append(
+                metrics.silhouette_score(distances, pred, metric='precomputed')
+            )
+        for item in self.truth_voxels_cluster_scores.keys():
+            self.truth_voxels_avg_cluster_scores[item] = (
+                np.sum(self.truth_voxels_cluster_scores[item])
+                / len(self.truth_voxels_cluster_predictions)
+            )
+        self.logger.info(f"Calculated average scores {self.truth_voxels_avg_cluster_scores} for level: {level}.")
+        return self.truth_voxels_avg_cluster_scores
 
     def plot_prediction_spectrum(self,
         num_bins:   int=100,
@@ -241,23 +582,32 @@ class NeutronClustering(NeutronCosmicDataset):
         else:
             self.cluster_spectrum = [[]]
         for ii, pred in enumerate(self.truth_cluster_predictions):
-            clusters = np.unique(pred)
-            for cluster in clusters:
-                indices = np.where(pred==cluster)
-                if edep_type == 'true':
-                    true_energies = sum(self.edep_energy[ii][indices])
-                    if true_energies < energy_cut:
-                        self.cluster_spectrum[0].append(true_energies)
-                elif edep_type == 'ion_scint':
-                    ion_scint_energies = sum(self.edep_num_electrons[ii][indices]*1.5763e-5)  # eV of Ar ionization (MeV)
-                    if ion_scint_energies < energy_cut:
-                        self.cluster_spectrum[0].append(ion_scint_energies)
-                else:
-                    true_energies = sum(self.edep_energy[ii][indices])
-                    ion_scint_energies = sum(self.edep_num_electrons[ii][indices]*1.5763e-5)
-                    if (true_energies < energy_cut and ion_scint_energies < energy_cut):
-                        self.cluster_spectrum[0].append(true_energies)
-                        self.cluster_spectrum[1].append(ion_scint_energies)
+            # one bincount pass sums every cluster's energy at once;
+            # labels start at -1 (noise), so shift by the minimum and
+            # drop bins with no members
+            pred = np.asarray(pred)
+            shifted = pred - pred.min()
+            occupied = (np.bincount(shifted) > 0)
+            if edep_type == 'true':
+                true_energies = np.bincount(
+                    shifted, weights=self.edep_energy[ii]
+                )[occupied]
+                self.cluster_spectrum[0].extend(true_energies[(true_energies < energy_cut)])
+            elif edep_type == 'ion_scint':
+                ion_scint_energies = np.bincount(
+                    shifted, weights=self.edep_num_electrons[ii]
+                )[occupied]*1.5763e-5  # eV of Ar ionization (MeV)
+                self.cluster_spectrum[0].extend(ion_scint_energies[(ion_scint_energies < energy_cut)])
+            else:
+                true_energies = np.bincount(
+                    shifted, weights=self.edep_energy[ii]
+                )[occupied]
+                ion_scint_energies = np.bincount(
+                    shifted, weights=self.edep_num_electrons[ii]
+                )[occupied]*1.5763e-5
+                passed = (true_energies < energy_cut) & (ion_scint_energies < energy_cut)
+                self.cluster_spectrum[0].extend(true_energies[passed])
+                self.cluster_spectrum[1].extend(ion_scint_energies[passed])
         fig, axs = plt.subplots()
         if len(self.cluster_spectrum) == 1:
             axs.hist(self.cluster_spectrum[0], bins=num_bins, label=edep_type)
@@ -282,20 +632,18 @@ class NeutronClustering(NeutronCosmicDataset):
         save:   str='',
         show:   bool=True,
     ):
-        cluster_spectrum = []
-        # loop through all edeps
-        for ii, truth in enumerate(self.edep_neutron_ids):
-            complete = 0
-            total = 0
-            clusters = np.unique(truth)
-            for cluster in clusters:
-                indices = np.where(truth==cluster)
-                true_energies = sum(self.edep_energy[ii][indices])
-                if (true_energies < energy_cut):
-                    self.cluster_spectrum.append(true_energies)
+        # the flat per-capture sums are cached by calculate_capture_ratio,
+        # so the spectrum is just a cut and a histogram; the previous loop
+        # also appended into the instance list, growing it on every call.
+        # the capture statistics ride along with the lazy mc_edeps load,
+        # which a cache-hit construction skips, so compute them on demand
+        if not hasattr(self, '_per_capture_energies'):
+            self.calculate_capture_ratio()
+        cluster_spectrum = self._per_capture_energies
+        cluster_spectrum = cluster_spectrum[(cluster_spectrum < energy_cut)]
         fig, axs = plt.subplots()
-        axs.hist(self.cluster_spectrum, bins=num_bins, label='mc spectrum')
-        axs.set_xlabel(rf'Capture Energy (MeV) - Complete Capture Ratio ({sum(self.num_complete_captures)}/{sum(self.num_captures)})$\approx${self.capture_ratio}%')
+        axs.hist(cluster_spectrum, bins=num_bins, label='mc spectrum')
+        axs.set_xlabel(rf'Capture Energy (MeV) - Complete Capture Ratio ({self.num_complete_captures.sum()}/{self.num_captures.sum()})$\approx${self.capture_ratio}%')
         axs.set_xticks(axs.get_xticks() + [6.098])
         axs.set_xlim(0,energy_cut)
         axs.set_title(title)
@@ -309,53 +657,110 @@ class NeutronClustering(NeutronCosmicDataset):
     def scan_truth_eps_values(self,
         eps_range:  list=[1.,100.],
         eps_step:   float=1.,
+        search:     str='grid',
         save_scores:str='scan_scores'
     ):
-        num_steps = int((eps_range[1] - eps_range[0])/eps_step)
-        eps_values = [eps_range[0] + ii*eps_step for ii in range(num_steps)]
-        scores = [['eps','homogeneity','completeness','v-measure','adjusted_rand_index','adjusted_mutual_info','silhouette']]
-        self.logger.info(f"Attempting to run scanning search with {num_steps} eps values from {eps_values[0]} to {eps_values[-1]}.")
-        for eps in eps_values:
-            self.logger.info(f"Running clustering for eps = {eps}.")
-            self.cluster_truth(
-                alg = 'dbscan',
-                params = {'eps': eps, 'min_samples': 6}
+        if search not in ['grid', 'coarse_fine', 'bayes']:
+            self.logger.warning(f"Requested search '{search}' not allowed, using 'grid'.")
+            search = 'grid'
+        scores = []
+        # the positions and truth labels don't change across eps, so they
+        # are extracted once and each eps value runs in its own worker
+        event_points = [self.event_positions(event) for event in range(self.num_events)]
+        event_labels = [self.edep_neutron_ids[event] for event in range(self.num_events)]
+        # one radius graph per event at the largest eps serves every
+        # smaller eps, since DBSCAN treats absent sparse entries as
+        # beyond reach; the spatial index is built once instead of once
+        # per eps value
+        event_graphs = [
+            neighbors.NearestNeighbors(radius=eps_range[1])
+                .fit(pos).radius_neighbors_graph(pos, mode='distance')
+            for pos in event_points
+        ]
+        def evaluate(eps_values):
+            return Parallel(n_jobs=-1, backend="loky", batch_size='auto')(
+                delayed(_cluster_and_score)(eps, 6, event_points, event_labels, event_graphs)
+                for eps in eps_values
             )
-            self.logger.info(f"Computing scores for eps = {eps}.")
-            avg_scores = self.calc_truth_scores()
-            score_list = [eps]
-            for item in avg_scores.keys():
-                score_list.append(avg_scores[item])
-            scores.append(score_list)
-        with open("clustering/" + save_scores + ".csv","w") as file:
-            writer = csv.writer(file, delimiter=",")
-            writer.writerows(scores)
+        if search == 'grid':
+            num_steps = int((eps_range[1] - eps_range[0])/eps_step)
+            eps_values = [eps_range[0] + ii*eps_step for ii in range(num_steps)]
+            self.logger.info(f"Attempting to run scanning search with {num_steps} eps values from {eps_values[0]} to {eps_values[-1]}.")
+            scores += evaluate(eps_values)
+        elif search == 'coarse_fine':
+            # the metric curves are smooth, so a coarse pass followed by
+            # a fine pass around the v-measure peak reaches the same
+            # answer with far fewer clusterings than the full grid
+            coarse_step = (eps_range[1] - eps_range[0]) / 10.
+            coarse_values = [eps_range[0] + ii*coarse_step for ii in range(10)]
+            self.logger.info(f"Running coarse eps scan with step {coarse_step}.")
+            coarse_scores = evaluate(coarse_values)
+            best = coarse_values[int(np.argmax([row[3] for row in coarse_scores]))]
+            fine_values = [
+                best - coarse_step + ii*eps_step
+                for ii in range(int(2.*coarse_step/eps_step))
+            ]
+            fine_values = [
+                eps for eps in fine_values
+                if eps_range[0] <= eps <= eps_range[1] and eps not in coarse_values
+            ]
+            self.logger.info(f"Running fine eps scan around {best} with step {eps_step}.")
+            scores += sorted(coarse_scores + evaluate(fine_values))
+        else:
+            try:
+                from skopt import gp_minimize
+                from skopt.space import Real
+            except ImportError:
+                self.logger.error("The 'scikit-optimize' package is required for search='bayes' but is not installed!")
+                raise ImportError("The 'scikit-optimize' package is required for search='bayes' but is not installed!")
+            self.logger.info(f"Running bayesian eps search over {eps_range}.")
+            evaluated = []
+            def objective(values):
+                row = _cluster_and_score(values[0], 6, event_points, event_labels, event_graphs)
+                evaluated.append(row)
+                # maximize the v-measure
+                return -row[3]
+            gp_minimize(objective, [Real(eps_range[0], eps_range[1])], n_calls=20)
+            scores += sorted(evaluated)
+        # one C-level savetxt call formats the whole numeric block,
+        # rather than the csv writer formatting every cell in Python
+        header = ','.join([
+            'eps', 'homogeneity', 'completeness', 'v_measure',
+            'adjusted_rand', 'adjusted_mutual_info', 'silhouette',
+        ])
+        np.savetxt(
+            "clustering/" + save_scores + ".csv",
+            np.asarray(scores, dtype=np.float64),
+            delimiter=',', header=header, comments='', fmt='%.6g',
+        )
     
     def plot_truth_eps_scores(self,
         input_file,
         save:   str='',
         show:   bool=True
     ):
-        scores = pd.read_csv("clustering/" + input_file, delimiter=",")
-        if 'eps' not in scores.keys():
-            self.logger.error(f"Column for 'eps' values not present in {input_file}: {scores.keys()}")
-            raise ValueError(f"Column for 'eps' values not present in {input_file}: {scores.keys()}")
+        # the scores file is a handful of rows, so a structured ndarray
+        # from genfromtxt covers it without a DataFrame allocation
+        scores = np.genfromtxt("clustering/" + input_file, delimiter=",", names=True)
+        if 'eps' not in scores.dtype.names:
+            self.logger.error(f"Column for 'eps' values not present in {input_file}: {scores.dtype.names}")
+            raise ValueError(f"Column for 'eps' values not present in {input_file}: {scores.dtype.names}")
         eps_values = scores['eps']
+        # one vectorized argmax over the stacked metric matrix and a
+        # single scatter for all the max markers
+        metric_cols = [item for item in scores.dtype.names if item != 'eps']
+        metric_matrix = np.stack([scores[item] for item in metric_cols], axis=1)
+        max_idx = np.argmax(metric_matrix, axis=0)
+        max_vals = metric_matrix[max_idx, np.arange(metric_matrix.shape[1])]
         fig, axs = plt.subplots(figsize=(8,6))
-        for item in scores.keys():
-            if item != 'eps':
-                axs.plot(
-                    eps_values, 
-                    scores[item],  
-                    linestyle='--'
-                )
-                max_index = np.argmax(scores[item])
-                axs.scatter(
-                    eps_values[max_index],
-                    scores[item][max_index],
-                    label=f'{item} - max ({eps_values[max_index]},{round(scores[item][max_index],3)})',
-                    marker='x'
-                )
+        for jj, item in enumerate(metric_cols):
+            axs.plot(
+                eps_values,
+                metric_matrix[:, jj],
+                linestyle='--',
+                label=f'{item} - max ({eps_values[max_idx[jj]]},{round(max_vals[jj],3)})'
+            )
+        axs.scatter(eps_values[max_idx], max_vals, marker='x')
         axs.set_xlabel('eps (mm)')
         axs.set_ylabel('metric')
         axs.set_title('Clustering metric vs. eps (mm)')
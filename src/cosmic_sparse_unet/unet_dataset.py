@@ -29,23 +29,75 @@ class NeutronUNetDataset(Dataset):
         self.logger = UNetLogger('dataset', file_mode='w')
         self.logger.info(f"Attempting to construct UNet dataset from {input_file}.")
         super(NeutronUNetDataset, self).__init__()
-        self.input_file = np.load(input_file, allow_pickle=True)
+        if input_file.endswith('.zst'):
+            # zstd-compressed datasets stream the arrays through a single
+            # compressed file in the order generate_unet_training wrote them
+            try:
+                import zstandard as zstd
+            except ImportError:
+                self.logger.error("The 'zstandard' package is required to read '.zst' datasets but is not installed!")
+                raise ImportError("The 'zstandard' package is required to read '.zst' datasets but is not installed!")
+            array_order = [
+                'coords', 'labels', 'energy',
+                'edep_idxs', 'offsets', 'tiles', 'tile_offsets',
+            ]
+            # read_array consumes each npy block sequentially with no
+            # rewind, which np.load would attempt and the zstd stream
+            # cannot seek backwards for
+            with zstd.open(input_file, 'rb') as compressed:
+                self.input_file = {
+                    array_name: np.lib.format.read_array(compressed, allow_pickle=True)
+                    for array_name in array_order
+                }
+        elif input_file.endswith('.h5'):
+            # hdf5 datasets slice lazily, so __getitem__ reads only one
+            # event's rows from disk rather than the whole arrays
+            try:
+                import h5py
+            except ImportError:
+                self.logger.error("The 'h5py' package is required to read '.h5' datasets but is not installed!")
+                raise ImportError("The 'h5py' package is required to read '.h5' datasets but is not installed!")
+            self.input_file = h5py.File(input_file, 'r')
+        else:
+            self.input_file = np.load(input_file, allow_pickle=True)
         try:
             self.coords = self.input_file['coords']
-            self.feats  = self.input_file['feats']
             self.labels = self.input_file['labels']
             self.energy = self.input_file['energy']
         except Exception as e:
             self.logger.error(f"One or more arrays not present in input file: {e}.")
             raise ValueError(f"One or more arrays not present in input file: {e}.")
-        self.num_events = len(self.coords)
+        # newer datasets omit the constant unit features and this class
+        # reconstructs them per event; older ones still store them
+        if 'feats' in self.input_file:
+            self.feats = self.input_file['feats']
+        else:
+            self.feats = None
+        # newer datasets store flat COO arrays with per-event offsets,
+        # older ones store one object array entry per event
+        if 'offsets' in self.input_file:
+            self.offsets = self.input_file['offsets']
+            self.num_events = len(self.offsets) - 1
+        else:
+            self.offsets = None
+            self.num_events = len(self.coords)
         self.weights = None
 
     def __len__(self):
         return self.num_events
 
     def __getitem__(self, idx):
+        if self.offsets is not None:
+            begin, end = self.offsets[idx], self.offsets[idx+1]
+            if self.feats is not None:
+                feats = self.feats[begin:end]
+            else:
+                feats = np.ones((end - begin, 1), dtype=np.float32)
+            return self.coords[begin:end], feats, self.labels[begin:end]
         coords = np.array(self.coords[idx])
-        feats  = np.array(self.feats[idx])
+        if self.feats is not None:
+            feats = np.array(self.feats[idx])
+        else:
+            feats = np.ones((len(coords), 1), dtype=np.float32)
         labels = np.array(self.labels[idx])
         return coords, feats, labels
\ No newline at end of file
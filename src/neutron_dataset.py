@@ -5,13 +5,17 @@ for training and clustering from LArSoft output.
 # imports
 import numpy as np
 import scipy as sp
+import matplotlib
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 import pandas as pd
 import uproot
 import os
 import sys
 import math
 import csv
+from concurrent.futures import ProcessPoolExecutor
 from sklearn import cluster
 from sklearn import metrics
 import seaborn as sns
@@ -20,6 +24,119 @@ import torch.nn as nn
 from torch.utils.data import Dataset
 from unet_logger import UNetLogger
 from parameters import *
+try:
+    import numba
+    from numba import njit, prange
+except ImportError:
+    njit = None
+try:
+    import awkward as ak
+except ImportError:
+    ak = None
+
+def _group_sum_numpy(ids, values):
+    order = np.argsort(ids, kind='stable')
+    sorted_ids = ids[order]
+    starts = np.flatnonzero(
+        np.concatenate(([True], sorted_ids[1:] != sorted_ids[:-1]))
+    )
+    return sorted_ids[starts], np.add.reduceat(values[order], starts)
+
+if njit is not None:
+    @njit(cache=True)
+    def _group_sum_numba(ids, values):
+        order = np.argsort(ids, kind='mergesort')
+        n = len(ids)
+        unique_ids = np.empty(n, dtype=ids.dtype)
+        sums = np.zeros(n, dtype=values.dtype)
+        num_groups = 0
+        for i in range(n):
+            idx = order[i]
+            if i == 0 or ids[idx] != ids[order[i-1]]:
+                unique_ids[num_groups] = ids[idx]
+                num_groups += 1
+            sums[num_groups-1] += values[idx]
+        return unique_ids[:num_groups], sums[:num_groups]
+
+def _depth_hist_numpy(y_pos, y_max, num_bins):
+    depth = np.abs(y_max - y_pos)
+    hist, edges = np.histogram(depth, bins=num_bins)
+    mid_points = 0.5 * (edges[:-1] + edges[1:])
+    return hist, mid_points
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _depth_hist_numba(y_pos, y_max, num_bins):
+        n = y_pos.shape[0]
+        depth_max = 0.0
+        for i in range(n):
+            d = abs(y_max - y_pos[i])
+            if d > depth_max:
+                depth_max = d
+        bin_width = depth_max / num_bins
+        # per-thread histograms with a final reduction, so the binning
+        # pass over y_pos runs on all cores without atomics
+        local = np.zeros((numba.get_num_threads(), num_bins), dtype=np.int64)
+        for i in prange(n):
+            b = int(abs(y_max - y_pos[i]) / bin_width)
+            if b == num_bins:
+                b = num_bins - 1
+            local[numba.get_thread_id(), b] += 1
+        hist = local.sum(axis=0)
+        mid_points = (np.arange(num_bins) + 0.5) * bin_width
+        return hist, mid_points
+
+def _depth_hist(y_pos, y_max, num_bins):
+    """
+    Depth histogram and bin mid points for the exponential fit, fused
+    into one pass over the capture positions so no depth/abs temporaries
+    are materialized.  Uses the parallel numba kernel when numba is
+    installed and the equivalent np.histogram path otherwise.
+    """
+    y_pos = np.ascontiguousarray(y_pos, dtype=np.float32)
+    if njit is not None:
+        return _depth_hist_numba(y_pos, y_max, num_bins)
+    return _depth_hist_numpy(y_pos, y_max, num_bins)
+
+def group_sum(ids, values):
+    """
+    Group-sum 'values' by 'ids' in one sorted pass, replacing the
+    per-group np.unique/np.where/sum pattern with a single scan.  Uses
+    the numba-compiled kernel when numba is installed and an equivalent
+    argsort + reduceat path otherwise.
+    """
+    ids = np.ascontiguousarray(ids)
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if njit is not None:
+        return _group_sum_numba(ids, values)
+    return _group_sum_numpy(ids, values)
+
+def _render_event(args):
+    """
+    Worker for plot_all_events.  Lives at module level so that only the
+    sliced per-event arrays are pickled across the process boundary,
+    never the dataset itself, and renders with the non-interactive Agg
+    backend so workers need no display.
+    """
+    name, event, x, y, z, tpc_lines, cryostat_lines = args
+    matplotlib.use('Agg', force=True)
+    fig = plt.figure(figsize=(8,6))
+    axs = fig.add_subplot(projection='3d')
+    axs.scatter(x, z, y, s=2)
+    axs.set_xlabel("x (mm)")
+    axs.set_ylabel("z (mm)")
+    axs.set_zlabel("y (mm)")
+    axs.set_title(f'Event {event} MC Voxels')
+    if tpc_lines is not None:
+        axs.add_collection3d(Line3DCollection(
+            tpc_lines[:,:,[0,2,1]], linestyle='--', color='b'
+        ))
+    if cryostat_lines is not None:
+        axs.add_collection3d(Line3DCollection(
+            cryostat_lines[:,:,[0,2,1]], linestyle=':', color='g'
+        ))
+    fig.savefig(f'plots/{name}/events/mc_voxels_3d_{event}.png')
+    plt.close(fig)
 
 class NeutronCosmicDataset:
     """
@@ -32,6 +149,16 @@ class NeutronCosmicDataset:
         muon:       the collection of muon event information
         voxels:     the collection of voxelized truth/reco information
     """
+    # executors shared by every instance so that basket decompression and
+    # interpretation overlap the file reads instead of running serially
+    decompression_executor = None
+    interpretation_executor = None
+    # caches shared across instantiations so that chaining several
+    # extract_output_*.root files re-uses parsed streamers and decompressed
+    # arrays instead of re-reading them per file
+    object_cache = None
+    array_cache = None
+
     def __init__(self,
         name:       str,
         input_file: str,
@@ -39,58 +166,92 @@ class NeutronCosmicDataset:
         load_mc_edeps:  bool=True,
         load_mc_voxels: bool=True,
         load_reco_edeps:bool=True,
+        entry_start:    int=None,
+        entry_stop:     int=None,
+        num_workers:    int=8,
+        voxelize_from_edeps:    bool=False,
+        voxel_size:     float=4.,
+        library:        str="np",
     ):
         self.load_neutrons  = load_neutrons
         self.load_mc_edeps  = load_mc_edeps
         self.load_mc_voxels = load_mc_voxels
         self.load_reco_edeps= load_reco_edeps
         self.name = name
+        self.entry_start = entry_start
+        self.entry_stop  = entry_stop
+        # with library="ak" the jagged branches stay in contiguous
+        # columnar buffers with offsets instead of object arrays of
+        # per-event numpy arrays, at a fraction of the resident memory
+        self.library = library
+        self.input_file_name = input_file
         self.logger = UNetLogger('neutron_dataset', file_mode='w')
         self.logger.info(f"Attempting to load file {input_file}.")
+        # set up the shared decompression/interpretation thread pools
+        if NeutronCosmicDataset.decompression_executor is None:
+            NeutronCosmicDataset.decompression_executor = uproot.ThreadPoolExecutor(num_workers)
+            NeutronCosmicDataset.interpretation_executor = uproot.ThreadPoolExecutor(max(1, num_workers//2))
+        if NeutronCosmicDataset.object_cache is None:
+            NeutronCosmicDataset.object_cache = uproot.LRUCache("500 MB")
+            NeutronCosmicDataset.array_cache = uproot.LRUArrayCache("1 GB")
         # load the file
         try:
-            self.input_file = uproot.open(input_file)
+            self.input_file = uproot.open(
+                input_file,
+                object_cache=self.object_cache,
+                array_cache=self.array_cache,
+            )
             self.logger.info(f"Successfully loaded file {input_file}.")
         except Exception:
             self.logger.error(f"Failed to load file with exception: {Exception}.")
             raise Exception
         if not os.path.isdir(f"plots/{self.name}/events/"):
             os.makedirs(f"plots/{self.name}/events/")
-        # now load the various arrays
+        # now load the various arrays; the heavy jagged branches are all
+        # deferred to first access through their properties, so workflows
+        # which only touch one product never decompress the others
         self.meta = self.load_array(self.input_file, 'ana/meta')
         self.geometry = self.load_array(self.input_file, 'ana/geometry')
+        self._neutron = None
+        self._num_neutron_events = None
+        self._capture_x = None
+        self._capture_y = None
+        self._capture_z = None
         if load_neutrons:
-            self.neutron = self.load_array(self.input_file, 'ana/mc_neutron_captures')
-            for item in required_neutron_arrays:
-                if item not in self.neutron.keys():
-                    self.logger.info(f"Required array {item} not present in mc_neutron_captures!")
-                    raise ValueError(f"Required array {item} not present in mc_neutron_captures!")
-            self.num_neutron_events = len(self.neutron['neutron_capture_x'])
-            self.logger.info(f"Loaded 'neutron' arrays with {self.num_neutron_events} entries.")
+            self.logger.info(f"Deferred loading of 'neutron' arrays until first access.")
+        self._mc_edeps = None
+        self._num_mc_edep_events = None
         if load_mc_edeps:
-            self.mc_edeps = self.load_array(self.input_file, 'ana/mc_energy_deposits')
-            for item in required_mc_edep_arrays:
-                if item not in self.mc_edeps.keys():
-                    self.logger.info(f"Required array {item} not present in mc_energy_deposits!")
-                    raise ValueError(f"Required array {item} not present in mc_energy_deposits!")
-            self.num_mc_edep_events = len(self.mc_edeps['pdg'])
-            self.logger.info(f"Loaded 'mc_energy_deposits' arrays with {self.num_mc_edep_events} entries.")
+            self.logger.info(f"Deferred loading of 'mc_energy_deposits' arrays until first access.")
+        self._mc_voxels = None
+        self._num_mc_voxel_events = None
+        # global index of the first event held in the voxel arrays; only
+        # non-zero while iter_events streams chunks through the instance
+        self.voxel_event_offset = 0
         if load_mc_voxels:
-            self.mc_voxels = self.load_array(self.input_file, 'ana/mc_voxels')
-            for item in required_voxel_arrays:
-                if item not in self.mc_voxels.keys():
-                    self.logger.info(f"Required array {item} not present in mc_voxels!")
-                    raise ValueError(f"Required array {item} not present in mc_voxels!")
-            self.num_mc_voxel_events = len(self.mc_voxels['voxels'])
-            self.discrete_voxel_values = [
-                [[1.] for i in range(len(self.mc_voxels['voxels'][i]))] 
-                    for i in range(len(self.mc_voxels['voxels']))
-                ]
-            self.logger.info(f"Loaded 'mc_voxels' arrays with {self.num_mc_voxel_events} entries.")
+            if voxelize_from_edeps and load_mc_edeps:
+                # the edep positions are already resident, so derive the
+                # voxel arrays from them rather than decompressing the
+                # voxel branches a second time
+                self._voxelize_from_edeps(voxel_size)
+                self.logger.info(f"Voxelized 'mc_energy_deposits' arrays into {self.num_mc_voxel_events} entries.")
+            else:
+                # the voxel branches are the largest in the file, so their
+                # decompression is deferred until something indexes them
+                self.logger.info(f"Deferred loading of 'mc_voxels' arrays until first access.")
         if load_reco_edeps:
-            self.reco_edeps = self.load_array(self.input_file, 'ana/reco_energy_deposits')
-
-            
+            self.reco_edeps = self.load_array(
+                self.input_file, 'ana/reco_energy_deposits',
+                filter_name=required_reco_edep_arrays,
+                entry_start=entry_start, entry_stop=entry_stop,
+                library=library,
+            )
+            for item in required_reco_edep_arrays:
+                if item not in self._array_fields(self.reco_edeps):
+                    self.logger.info(f"Required array {item} not present in reco_energy_deposits!")
+                    raise ValueError(f"Required array {item} not present in reco_energy_deposits!")
+            self.num_reco_edep_events = len(self.reco_edeps['pdg'])
+            self.logger.info(f"Loaded 'reco_energy_deposits' arrays with {self.num_reco_edep_events} entries.")
         # construct TPC boxes
         self.world_box_ranges = self.geometry['world_box_ranges']
         self.world_x = [self.world_box_ranges[0][0], self.world_box_ranges[0][1]]
@@ -100,57 +261,496 @@ class NeutronCosmicDataset:
         self.tpc_x = [self.total_tpc_ranges[0][0], self.total_tpc_ranges[0][1]]
         self.tpc_y = [self.total_tpc_ranges[0][2], self.total_tpc_ranges[0][3]]
         self.tpc_z = [self.total_tpc_ranges[0][4], self.total_tpc_ranges[0][5]]
-        self.active_tpc_lines = [
-            [[self.tpc_x[0],self.tpc_y[0],self.tpc_z[0]],[self.tpc_x[1],self.tpc_y[0],self.tpc_z[0]]],
-            [[self.tpc_x[0],self.tpc_y[0],self.tpc_z[0]],[self.tpc_x[0],self.tpc_y[1],self.tpc_z[0]]],
-            [[self.tpc_x[0],self.tpc_y[0],self.tpc_z[0]],[self.tpc_x[0],self.tpc_y[0],self.tpc_z[1]]],
-            [[self.tpc_x[0],self.tpc_y[1],self.tpc_z[0]],[self.tpc_x[1],self.tpc_y[1],self.tpc_z[0]]],
-            [[self.tpc_x[0],self.tpc_y[1],self.tpc_z[0]],[self.tpc_x[0],self.tpc_y[1],self.tpc_z[1]]],
-            [[self.tpc_x[1],self.tpc_y[0],self.tpc_z[0]],[self.tpc_x[1],self.tpc_y[0],self.tpc_z[1]]],
-            [[self.tpc_x[1],self.tpc_y[0],self.tpc_z[0]],[self.tpc_x[1],self.tpc_y[1],self.tpc_z[0]]],
-            [[self.tpc_x[0],self.tpc_y[1],self.tpc_z[1]],[self.tpc_x[1],self.tpc_y[1],self.tpc_z[1]]],
-            [[self.tpc_x[0],self.tpc_y[1],self.tpc_z[1]],[self.tpc_x[0],self.tpc_y[0],self.tpc_z[1]]],
-            [[self.tpc_x[1],self.tpc_y[0],self.tpc_z[1]],[self.tpc_x[1],self.tpc_y[1],self.tpc_z[1]]],
-            [[self.tpc_x[1],self.tpc_y[0],self.tpc_z[1]],[self.tpc_x[0],self.tpc_y[0],self.tpc_z[1]]],
-            [[self.tpc_x[1],self.tpc_y[1],self.tpc_z[0]],[self.tpc_x[1],self.tpc_y[1],self.tpc_z[1]]],
-        ]
+        # cache the wireframes as (12,2,3) float32 segment arrays so
+        # plot calls never rebuild them edge by edge
+        self.active_tpc_lines = self._box_wireframe(self.tpc_x, self.tpc_y, self.tpc_z)
         # cryostat boundary
         self.total_cryo_ranges = self.geometry['cryostat_box_ranges']
         self.cryo_x = [self.total_cryo_ranges[0][0], self.total_cryo_ranges[0][1]]
         self.cryo_y = [self.total_cryo_ranges[0][2], self.total_cryo_ranges[0][3]]
         self.cryo_z = [self.total_cryo_ranges[0][4], self.total_cryo_ranges[0][5]]
-        self.cryostat_lines = [
-            [[self.cryo_x[0],self.cryo_y[0],self.cryo_z[0]],[self.cryo_x[1],self.cryo_y[0],self.cryo_z[0]]],
-            [[self.cryo_x[0],self.cryo_y[0],self.cryo_z[0]],[self.cryo_x[0],self.cryo_y[1],self.cryo_z[0]]],
-            [[self.cryo_x[0],self.cryo_y[0],self.cryo_z[0]],[self.cryo_x[0],self.cryo_y[0],self.cryo_z[1]]],
-            [[self.cryo_x[0],self.cryo_y[1],self.cryo_z[0]],[self.cryo_x[1],self.cryo_y[1],self.cryo_z[0]]],
-            [[self.cryo_x[0],self.cryo_y[1],self.cryo_z[0]],[self.cryo_x[0],self.cryo_y[1],self.cryo_z[1]]],
-            [[self.cryo_x[1],self.cryo_y[0],self.cryo_z[0]],[self.cryo_x[1],self.cryo_y[0],self.cryo_z[1]]],
-            [[self.cryo_x[1],self.cryo_y[0],self.cryo_z[0]],[self.cryo_x[1],self.cryo_y[1],self.cryo_z[0]]],
-            [[self.cryo_x[0],self.cryo_y[1],self.cryo_z[1]],[self.cryo_x[1],self.cryo_y[1],self.cryo_z[1]]],
-            [[self.cryo_x[0],self.cryo_y[1],self.cryo_z[1]],[self.cryo_x[0],self.cryo_y[0],self.cryo_z[1]]],
-            [[self.cryo_x[1],self.cryo_y[0],self.cryo_z[1]],[self.cryo_x[1],self.cryo_y[1],self.cryo_z[1]]],
-            [[self.cryo_x[1],self.cryo_y[0],self.cryo_z[1]],[self.cryo_x[0],self.cryo_y[0],self.cryo_z[1]]],
-            [[self.cryo_x[1],self.cryo_y[1],self.cryo_z[0]],[self.cryo_x[1],self.cryo_y[1],self.cryo_z[1]]],
-        ]
-        self.calculate_capture_ratio()
+        self.cryostat_lines = self._box_wireframe(self.cryo_x, self.cryo_y, self.cryo_z)
+
+    def _box_wireframe(self,
+        x,
+        y,
+        z,
+    ):
+        """
+        The twelve edges of an axis-aligned box as a (12,2,3) float32
+        segment array, ready for a single Line3DCollection.
+        """
+        return np.asarray([
+            [[x[0],y[0],z[0]],[x[1],y[0],z[0]]],
+            [[x[0],y[0],z[0]],[x[0],y[1],z[0]]],
+            [[x[0],y[0],z[0]],[x[0],y[0],z[1]]],
+            [[x[0],y[1],z[0]],[x[1],y[1],z[0]]],
+            [[x[0],y[1],z[0]],[x[0],y[1],z[1]]],
+            [[x[1],y[0],z[0]],[x[1],y[0],z[1]]],
+            [[x[1],y[0],z[0]],[x[1],y[1],z[0]]],
+            [[x[0],y[1],z[1]],[x[1],y[1],z[1]]],
+            [[x[0],y[1],z[1]],[x[0],y[0],z[1]]],
+            [[x[1],y[0],z[1]],[x[1],y[1],z[1]]],
+            [[x[1],y[0],z[1]],[x[0],y[0],z[1]]],
+            [[x[1],y[1],z[0]],[x[1],y[1],z[1]]],
+        ], dtype=np.float32)
 
     def load_array(self,
         input_file,
         array_name,
+        filter_name=None,
+        entry_start:    int=None,
+        entry_stop:     int=None,
+        library:        str="np",
     ):
+        """
+        Load the requested branches in one call.  With library="ak" the
+        jagged branches come back as awkward arrays, which store their
+        contents contiguously with offsets rather than as object arrays
+        of per-event numpy arrays, so per-event groupbys can be fused
+        with ak.sum/ak.flatten instead of Python loops.
+        """
         self.logger.info(f"Attempting to load array: {array_name} from file: {input_file}.")
         try:
-            array = input_file[array_name].arrays(library="np")
+            # fetch every requested branch in a single call so that
+            # decompression of the baskets overlaps across branches
+            array = input_file[array_name].arrays(
+                filter_name=filter_name,
+                library=library,
+                entry_start=entry_start,
+                entry_stop=entry_stop,
+                decompression_executor=self.decompression_executor,
+                interpretation_executor=self.interpretation_executor,
+            )
             self.logger.info(f"Successfully loaded array: {array_name} from file: {input_file}.")
         except Exception:
             self.logger.error(f"Failed to load array: {array_name} from file: {input_file} with exception: {Exception}.")
             raise Exception
         return array
 
+    def _array_fields(self,
+        array,
+    ):
+        # numpy-backed loads are dicts of branch arrays, awkward-backed
+        # loads are record arrays exposing the same names as fields
+        if hasattr(array, 'keys'):
+            return array.keys()
+        return array.fields
+
+    def iterate_array(self,
+        array_name,
+        filter_name=None,
+        step_size:  str="100 MB",
+        library:    str="np",
+    ):
+        """
+        Stream the requested branches in chunks of 'step_size' rather
+        than materializing the whole tree, for files too large for
+        load_array to hold resident.
+        """
+        self.logger.info(f"Iterating array: {array_name} in chunks of {step_size}.")
+        yield from uproot.iterate(
+            f"{self.input_file_name}:{array_name}",
+            filter_name=filter_name,
+            step_size=step_size,
+            library=library,
+            decompression_executor=self.decompression_executor,
+            interpretation_executor=self.interpretation_executor,
+        )
+
+    @property
+    def neutron(self):
+        if self._neutron is None:
+            self._load_neutrons()
+        return self._neutron
+
+    @neutron.setter
+    def neutron(self, value):
+        self._neutron = value
+
+    @property
+    def num_neutron_events(self):
+        if self._num_neutron_events is None:
+            self._load_neutrons()
+        return self._num_neutron_events
+
+    @num_neutron_events.setter
+    def num_neutron_events(self, value):
+        self._num_neutron_events = value
+
+    @property
+    def capture_x(self):
+        if self._capture_x is None:
+            self._load_neutrons()
+        return self._capture_x
+
+    @capture_x.setter
+    def capture_x(self, value):
+        self._capture_x = value
+
+    @property
+    def capture_y(self):
+        if self._capture_y is None:
+            self._load_neutrons()
+        return self._capture_y
+
+    @capture_y.setter
+    def capture_y(self, value):
+        self._capture_y = value
+
+    @property
+    def capture_z(self):
+        if self._capture_z is None:
+            self._load_neutrons()
+        return self._capture_z
+
+    @capture_z.setter
+    def capture_z(self, value):
+        self._capture_z = value
+
+    def _load_neutrons(self):
+        """
+        Read and validate the mc_neutron_captures branches.  Called on
+        first access through the neutron / capture position properties,
+        so workflows which never touch the captures never pay for them.
+        """
+        if self.load_neutrons == False:
+            self.logger.error(f"Dataset does not have 'neutron' products loaded! (i.e. 'self.load_neutrons' = {self.load_neutrons})")
+            raise ValueError(f"Dataset does not have 'neutron' products loaded! (i.e. 'self.load_neutrons' = {self.load_neutrons})")
+        self._neutron = self.load_array(
+            self.input_file, 'ana/mc_neutron_captures',
+            filter_name=required_neutron_arrays,
+            entry_start=self.entry_start, entry_stop=self.entry_stop,
+            library=self.library,
+        )
+        for item in required_neutron_arrays:
+            if item not in self._array_fields(self._neutron):
+                self.logger.info(f"Required array {item} not present in mc_neutron_captures!")
+                raise ValueError(f"Required array {item} not present in mc_neutron_captures!")
+        self._num_neutron_events = len(self._neutron['neutron_capture_x'])
+        # flat capture positions, concatenated once at load time so
+        # the density and depth analyses do no per-call gathering
+        if ak is not None and isinstance(self._neutron, ak.Array):
+            self._capture_x = ak.to_numpy(ak.flatten(self._neutron['neutron_capture_x']))
+            self._capture_y = ak.to_numpy(ak.flatten(self._neutron['neutron_capture_y']))
+            self._capture_z = ak.to_numpy(ak.flatten(self._neutron['neutron_capture_z']))
+        else:
+            self._capture_x = np.concatenate(self._neutron['neutron_capture_x'])
+            self._capture_y = np.concatenate(self._neutron['neutron_capture_y'])
+            self._capture_z = np.concatenate(self._neutron['neutron_capture_z'])
+        self.logger.info(f"Loaded 'neutron' arrays with {self._num_neutron_events} entries.")
+
+    @property
+    def mc_edeps(self):
+        if self._mc_edeps is None:
+            self._load_mc_edeps()
+        return self._mc_edeps
+
+    @mc_edeps.setter
+    def mc_edeps(self, value):
+        self._mc_edeps = value
+
+    @property
+    def num_mc_edep_events(self):
+        if self._num_mc_edep_events is None:
+            self._load_mc_edeps()
+        return self._num_mc_edep_events
+
+    @num_mc_edep_events.setter
+    def num_mc_edep_events(self, value):
+        self._num_mc_edep_events = value
+
+    def _load_mc_edeps(self):
+        """
+        Read and validate the mc_energy_deposits branches.  Called on
+        first access through the mc_edeps / num_mc_edep_events
+        properties; the capture statistics are derived here since they
+        are a single pass over the freshly decompressed deposits.
+        """
+        if self.load_mc_edeps == False:
+            self.logger.error(f"Dataset does not have 'mc_edeps' products loaded! (i.e. 'self.load_mc_edeps' = {self.load_mc_edeps})")
+            raise ValueError(f"Dataset does not have 'mc_edeps' products loaded! (i.e. 'self.load_mc_edeps' = {self.load_mc_edeps})")
+        self._mc_edeps = self.load_array(
+            self.input_file, 'ana/mc_energy_deposits',
+            filter_name=required_mc_edep_arrays,
+            entry_start=self.entry_start, entry_stop=self.entry_stop,
+            library=self.library,
+        )
+        for item in required_mc_edep_arrays:
+            if item not in self._array_fields(self._mc_edeps):
+                self.logger.info(f"Required array {item} not present in mc_energy_deposits!")
+                raise ValueError(f"Required array {item} not present in mc_energy_deposits!")
+        self._num_mc_edep_events = len(self._mc_edeps['pdg'])
+        self.logger.info(f"Loaded 'mc_energy_deposits' arrays with {self._num_mc_edep_events} entries.")
+        self.calculate_capture_ratio()
+
+    @property
+    def mc_voxels(self):
+        if self._mc_voxels is None:
+            self._load_mc_voxels()
+        return self._mc_voxels
+
+    @mc_voxels.setter
+    def mc_voxels(self, value):
+        self._mc_voxels = value
+
+    @property
+    def num_mc_voxel_events(self):
+        if self._num_mc_voxel_events is None:
+            self._load_mc_voxels()
+        return self._num_mc_voxel_events
+
+    @num_mc_voxel_events.setter
+    def num_mc_voxel_events(self, value):
+        self._num_mc_voxel_events = value
+
+    def _load_mc_voxels(self):
+        """
+        Read and validate the mc_voxels branches.  Called on first access
+        through the mc_voxels / num_mc_voxel_events properties, so
+        workflows which never index the voxels never pay for them.
+        """
+        if self.load_mc_voxels == False:
+            self.logger.error(f"Dataset does not have 'mc_voxels' products loaded! (i.e. 'self.load_mc_voxels' = {self.load_mc_voxels})")
+            raise ValueError(f"Dataset does not have 'mc_voxels' products loaded! (i.e. 'self.load_mc_voxels' = {self.load_mc_voxels})")
+        self._mc_voxels = self.load_array(
+            self.input_file, 'ana/mc_voxels',
+            filter_name=required_voxel_arrays,
+            entry_start=self.entry_start, entry_stop=self.entry_stop,
+            library=self.library,
+        )
+        for item in required_voxel_arrays:
+            if item not in self._array_fields(self._mc_voxels):
+                self.logger.info(f"Required array {item} not present in mc_voxels!")
+                raise ValueError(f"Required array {item} not present in mc_voxels!")
+        self._num_mc_voxel_events = len(self._mc_voxels['voxels'])
+        self._build_sparse_voxels()
+        self.logger.info(f"Loaded 'mc_voxels' arrays with {self._num_mc_voxel_events} entries.")
+
+    def _morton_encode(self,
+        ix,
+        iy,
+        iz,
+    ):
+        """
+        Interleave the bits of three non-negative 21-bit indices into a
+        single uint64 Morton (Z-order) code.  Sorting the scalar codes
+        groups spatially adjacent voxels at every scale, so one sort both
+        dedupes and leaves the arrays cache-friendly for downstream
+        consumers, while comparing one uint64 per voxel instead of three
+        int32 columns.
+        """
+        def expand(v):
+            # spread the low 21 bits out to every third bit position
+            v = v.astype(np.uint64)
+            v = (v | (v << np.uint64(32))) & np.uint64(0x1f00000000ffff)
+            v = (v | (v << np.uint64(16))) & np.uint64(0x1f0000ff0000ff)
+            v = (v | (v << np.uint64(8)))  & np.uint64(0x100f00f00f00f00f)
+            v = (v | (v << np.uint64(4)))  & np.uint64(0x10c30c30c30c30c3)
+            v = (v | (v << np.uint64(2)))  & np.uint64(0x1249249249249249)
+            return v
+        return (
+            expand(ix)
+            | (expand(iy) << np.uint64(1))
+            | (expand(iz) << np.uint64(2))
+        )
+
+    def _build_sparse_voxels(self):
+        """
+        Flatten the per-event voxel lists into a COO-style layout: one
+        (nnz,3) int32 coordinate array with matching flat label/energy
+        arrays, plus an offsets array delimiting events.  Voxel occupancy
+        is <<1%, so nothing is ever densified, and the constant unit
+        features are implied rather than materialized per voxel.
+        """
+        voxels = self.mc_voxels['voxels']
+        if ak is not None and isinstance(voxels, ak.Array):
+            # awkward input (library="ak") already stores the jagged
+            # contents contiguously, so the flatten is two C-level calls
+            # with no per-event Python iteration at all
+            counts = ak.to_numpy(ak.num(voxels)).astype(np.int64)
+            self.voxel_coords = np.asarray(
+                ak.flatten(voxels), dtype=np.int32
+            ).reshape(-1,3)
+            self.voxel_labels = ak.to_numpy(ak.flatten(self.mc_voxels['labels']))
+            self.voxel_energy = np.asarray(
+                ak.flatten(self.mc_voxels['energy']), dtype=np.float32
+            )
+        else:
+            counts = np.array(
+                [len(event_voxels) for event_voxels in voxels],
+                dtype=np.int64
+            )
+            self.voxel_coords = np.concatenate([
+                np.asarray(event_voxels, dtype=np.int32).reshape(-1,3)
+                for event_voxels in voxels
+            ])
+            self.voxel_labels = np.concatenate([
+                np.asarray(labels) for labels in self.mc_voxels['labels']
+            ])
+            self.voxel_energy = np.concatenate([
+                np.asarray(energy, dtype=np.float32)
+                for energy in self.mc_voxels['energy']
+            ])
+        self.voxel_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.voxel_offsets[1:])
+        # flat per-voxel deposit-index lists aligned row-for-row with the
+        # flat arrays above, so the tile sort can permute them together;
+        # the ragged id lists have no columnar representation, making
+        # this the one flatten that stays a Python-level pass
+        self.voxel_edep_idxs = np.empty(int(self.voxel_offsets[-1]), dtype=object)
+        pos = 0
+        for event_idxs in self.mc_voxels['edep_idxs']:
+            for idxs in event_idxs:
+                self.voxel_edep_idxs[pos] = np.asarray(idxs)
+                pos += 1
+
+    def _voxelize_from_edeps(self,
+        voxel_size: float=4.,
+    ):
+        """
+        Build the sparse voxel arrays from the already-loaded energy
+        deposits: bucket the edep positions onto the voxel grid and sum
+        energies in a single sort/reduceat pass per event.  Voxels whose
+        energy is dominated by neutron-ancestored deposits get label 0,
+        matching the mc_voxels convention.
+        """
+        coords_list, labels_list, energy_list, edep_idxs_list = [], [], [], []
+        counts = np.zeros(self.num_mc_edep_events, dtype=np.int64)
+        for ii in range(self.num_mc_edep_events):
+            positions = np.column_stack((
+                self.mc_edeps['edep_x'][ii],
+                self.mc_edeps['edep_y'][ii],
+                self.mc_edeps['edep_z'][ii],
+            ))
+            ijk = np.floor_divide(positions, voxel_size).astype(np.int32)
+            energy = np.asarray(self.mc_edeps['energy'][ii], dtype=np.float32)
+            neutron = (np.asarray(self.mc_edeps['pdg'][ii]) == 2112)
+            # Morton-encode the three indices into one uint64 key so the
+            # dedupe is a single sort over scalars which also leaves the
+            # voxels in spatially local Z-order
+            shifted = ijk.astype(np.int64) + 2**20
+            keys = self._morton_encode(shifted[:,0], shifted[:,1], shifted[:,2])
+            order = np.argsort(keys)
+            starts = np.flatnonzero(
+                np.concatenate(([True], np.diff(keys[order]) != 0))
+            )
+            voxel_energy = np.add.reduceat(energy[order], starts)
+            neutron_energy = np.add.reduceat(
+                np.where(neutron[order], energy[order], 0.), starts
+            )
+            coords_list.append(ijk[order][starts])
+            energy_list.append(voxel_energy.astype(np.float32))
+            labels_list.append(
+                (neutron_energy < 0.5 * voxel_energy).astype(np.int64)
+            )
+            edep_idxs_list.append(np.array(np.split(order, starts[1:]), dtype=object))
+            counts[ii] = len(starts)
+        self.voxel_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.voxel_offsets[1:])
+        self.voxel_coords = np.concatenate(coords_list)
+        self.voxel_labels = np.concatenate(labels_list)
+        self.voxel_energy = np.concatenate(energy_list)
+        self.voxel_edep_idxs = np.empty(int(self.voxel_offsets[-1]), dtype=object)
+        pos = 0
+        for event_idxs in edep_idxs_list:
+            for idxs in event_idxs:
+                self.voxel_edep_idxs[pos] = idxs
+                pos += 1
+        self.mc_voxels = {
+            'edep_idxs': np.array(edep_idxs_list, dtype=object),
+        }
+        self.num_mc_voxel_events = self.num_mc_edep_events
+
+    def event_voxels(self,
+        event:  int,
+    ):
+        """
+        Return (coords, labels, energy) views into the flat voxel arrays
+        for a single event - no copies are made.
+        """
+        if self._num_mc_voxel_events is None:
+            self._load_mc_voxels()
+        begin = self.voxel_offsets[event]
+        end   = self.voxel_offsets[event+1]
+        return (
+            self.voxel_coords[begin:end],
+            self.voxel_labels[begin:end],
+            self.voxel_energy[begin:end],
+        )
+
+    def iter_events(self,
+        step_size:  str="100 MB",
+    ):
+        """
+        Generator which streams the mc_voxels tree in chunks of 'step_size',
+        re-binding the voxel arrays to the current chunk and yielding the
+        range of global event indices it covers.  This keeps the resident
+        set bounded by the chunk size rather than the file size, and lets
+        uproot decompress the next chunk while the caller processes the
+        current one.  voxel_event_offset tracks where the resident chunk
+        starts so the voxel plot methods can translate the global indices;
+        after the loop finishes the instance's voxel arrays still hold
+        only the final chunk.
+        """
+        if self.load_mc_voxels == False:
+            self.logger.error(f"Dataset does not have 'mc_voxels' products loaded! (i.e. 'self.load_mc_voxels' = {self.load_mc_voxels})")
+            raise ValueError(f"Dataset does not have 'mc_voxels' products loaded! (i.e. 'self.load_mc_voxels' = {self.load_mc_voxels})")
+        start = 0
+        for chunk in self.iterate_array(
+            'ana/mc_voxels',
+            filter_name=required_voxel_arrays,
+            step_size=step_size,
+        ):
+            self.mc_voxels = chunk
+            self.num_mc_voxel_events = len(chunk['voxels'])
+            self._build_sparse_voxels()
+            self.voxel_event_offset = start
+            yield range(start, start + self.num_mc_voxel_events)
+            start += self.num_mc_voxel_events
+
+    def _draw_detector_boundaries(self,
+        axs,
+        plot_type:      str='3d',
+        show_active_tpc:bool=True,
+        show_cryostat:  bool=True,
+    ):
+        """
+        Draw the cached active TPC / cryostat wireframes onto an axis as
+        one line collection per volume.  The (12,2,3) segment arrays are
+        built once in the constructor, so a plot call only pays for the
+        single collection artist.
+        """
+        # 3d plots use (x,z,y) ordering to keep the beam axis horizontal
+        projections = {'3d': [0,2,1], 'xy': [0,1], 'xz': [0,2], 'yz': [1,2]}
+        columns = projections[plot_type]
+        volumes = []
+        if show_active_tpc:
+            volumes.append(('tpc', self.active_tpc_lines, '--', 'b', 'Active TPC volume'))
+        if show_cryostat:
+            volumes.append(('cryostat', self.cryostat_lines, ':', 'g', 'Cryostat volume'))
+        if not hasattr(self, '_projected_segments'):
+            self._projected_segments = {}
+        for volume, segments, linestyle, color, label in volumes:
+            # each projection of a volume is sliced once and cached, since
+            # the same wireframes are drawn on thousands of event plots
+            if (volume, plot_type) not in self._projected_segments:
+                self._projected_segments[(volume, plot_type)] = (
+                    np.ascontiguousarray(segments[:,:,columns])
+                )
+            segments = self._projected_segments[(volume, plot_type)]
+            if plot_type == '3d':
+                axs.add_collection3d(Line3DCollection(
+                    segments, linestyle=linestyle, color=color, label=label
+                ))
+            else:
+                axs.add_collection(LineCollection(
+                    segments, linestyle=linestyle, color=color, label=label
+                ))
+
     """
     The following functions are for plotting and analyzing
-    neutron captures, whose data products are stored in 
+    neutron captures, whose data products are stored in
     self.neutron.
     """
     def plot_capture_locations(self,
@@ -226,106 +826,11 @@ class NeutronCosmicDataset:
                 axs.scatter(x, y)
                 axs.set_xlabel("x (mm)")
                 axs.set_ylabel("y (mm)")
-        if show_active_tpc:
-            for i in range(len(self.active_tpc_lines)):
-                x = np.array([
-                    self.active_tpc_lines[i][0][0],
-                    self.active_tpc_lines[i][1][0]
-                ])
-                y = np.array([
-                    self.active_tpc_lines[i][0][1],
-                    self.active_tpc_lines[i][1][1]
-                ])
-                z = np.array([
-                    self.active_tpc_lines[i][0][2],
-                    self.active_tpc_lines[i][1][2]
-                ])
-                if plot_type == '3d':
-                    if i == 0:
-                        axs.plot(
-                            x,z,y,
-                            linestyle='--',color='b',
-                            label='Active TPC volume'
-                        )
-                    else:
-                        axs.plot(x,z,y,linestyle='--',color='b')
-                elif plot_type == 'xz':
-                    if i == 0:
-                        axs.plot(
-                            x,z,
-                            linestyle='--',color='b',
-                            label='Active TPC volume'
-                        )
-                    else:
-                        axs.plot(x,z,linestyle='--',color='b')
-                elif plot_type == 'yz':
-                    if i == 0:
-                        axs.plot(
-                            y,z,
-                            linestyle='--',color='b',
-                            label='Active TPC volume'
-                        )
-                    else:
-                        axs.plot(y,z,linestyle='--',color='b')
-                else:
-                    if i == 0:
-                        axs.plot(
-                            x,y,
-                            linestyle='--',color='b',
-                            label='Active TPC volume'
-                        )
-                    else:
-                        axs.plot(x,y,linestyle='--',color='b')
-        if show_cryostat:
-            for i in range(len(self.cryostat_lines)):
-                x = np.array([
-                    self.cryostat_lines[i][0][0],
-                    self.cryostat_lines[i][1][0]
-                ])
-                y = np.array([
-                    self.cryostat_lines[i][0][1],
-                    self.cryostat_lines[i][1][1]
-                ])
-                z = np.array([
-                    self.cryostat_lines[i][0][2],
-                    self.cryostat_lines[i][1][2]
-                ])
-                if plot_type == '3d':
-                    if i == 0:
-                        axs.plot(
-                            x,z,y,
-                            linestyle=':',color='g',
-                            label='Cryostat volume'
-                        )
-                    else:
-                        axs.plot(x,z,y,linestyle=':',color='g')
-                elif plot_type == 'xz':
-                    if i == 0:
-                        axs.plot(
-                            x,z,
-                            linestyle=':',color='g',
-                            label='Cryostat volume'
-                        )
-                    else:
-                        axs.plot(x,z,linestyle=':',color='g')
-                elif plot_type == 'yz':
-                    if i == 0:
-                        axs.plot(
-                            y,z,
-                            linestyle=':',color='g',
-                            label='Cryostat volume'
-                        )
-                    else:
-                        axs.plot(y,z,linestyle=':',color='g')
-                else:
-                    if i == 0:
-                        axs.plot(
-                            x,y,
-                            linestyle=':',color='g',
-                            label='Cryostat volume'
-                        )
-                    else:
-                        axs.plot(x,y,linestyle=':',color='g')
+        self._draw_detector_boundaries(
+            axs, plot_type,
+            show_active_tpc=show_active_tpc,
+            show_cryostat=show_cryostat,
+        )
         axs.set_title(title)
         plt.legend()
         plt.tight_layout()
@@ -342,21 +847,34 @@ class NeutronCosmicDataset:
         self.logger.info(f"Attempting to calculate capture ratio.")
         self.num_complete_captures = []
         self.num_captures = []
-        # loop through all edeps
+        per_capture_energies = []
+        # loop through all edeps, summing each capture's deposits in a
+        # single group_sum pass per event
         for ii, pdgs in enumerate(self.mc_edeps['pdg']):
-            complete = 0
-            total = 0
-            truth = self.mc_edeps['ancestor_id'][ii][(pdgs == 2112)]
-            clusters = np.unique(truth)
-            for cluster in clusters:
-                indices = np.where(truth == cluster)
-                true_energies = sum(self.mc_edeps['energy'][ii][indices])
-                total += 1
-                if round(true_energies,2) == 6.1:
-                    complete += 1
-            self.num_captures.append(total)
-            self.num_complete_captures.append(complete)
-        self.capture_ratio = round((sum(self.num_complete_captures)/sum(self.num_captures))*100)
+            mask = (np.asarray(pdgs) == 2112)
+            truth = np.asarray(self.mc_edeps['ancestor_id'][ii])[mask]
+            if len(truth) == 0:
+                self.num_captures.append(0)
+                self.num_complete_captures.append(0)
+                continue
+            energy = np.asarray(self.mc_edeps['energy'][ii])[mask]
+            capture_ids, capture_energies = group_sum(truth, energy)
+            per_capture_energies.append(capture_energies)
+            self.num_captures.append(len(capture_ids))
+            self.num_complete_captures.append(
+                int(np.count_nonzero(np.round(capture_energies, 2) == 6.1))
+            )
+        # flat per-capture sums, cached so the spectrum plots reduce to a
+        # cut and a histogram with no per-event loop
+        if per_capture_energies:
+            self._per_capture_energies = np.concatenate(
+                per_capture_energies
+            ).astype(np.float32)
+        else:
+            self._per_capture_energies = np.zeros(0, dtype=np.float32)
+        self.num_captures = np.asarray(self.num_captures)
+        self.num_complete_captures = np.asarray(self.num_complete_captures)
+        self.capture_ratio = round((self.num_complete_captures.sum()/self.num_captures.sum())*100)
     
     def plot_mc_edep_locations(self,
         event,
@@ -367,6 +885,7 @@ class NeutronCosmicDataset:
         title:          str='Example MC Edep Locations',
         save:           bool=True,
         show:           bool=False,
+        legend_cutoff:  int=10,
     ):
         if self.load_mc_edeps == False:
             self.logger.error(f"Dataset does not have 'mc_energy_deposits' products loaded! (i.e. 'self.load_mc_edeps' = {self.load_mc_edeps})")
@@ -407,27 +926,13 @@ class NeutronCosmicDataset:
         z = z[mask]
         energy = self.mc_edeps['energy'][event][mask]
         pdg = self.mc_edeps['pdg'][event][mask]
-        unique_pdgs = np.unique(pdg)
-        unique_x = []
-        unique_y = []
-        unique_z = []
-        unique_energy = []
-        for item in unique_pdgs:
-            unique_x.append(x[(pdg == item)])
-            unique_y.append(y[(pdg == item)])
-            unique_z.append(z[(pdg == item)])
-            unique_energy.append(energy[(pdg == item)])
+        # one scatter colored by pdg code instead of one artist per pdg
+        unique_pdgs, pdg_codes = np.unique(pdg, return_inverse=True)
+        sizes = 20 * energy
         if plot_type == '3d':
             fig = plt.figure(figsize=(8,6))
             axs = fig.add_subplot(projection='3d')
-            for ii in range(len(unique_pdgs)):
-                axs.scatter(
-                    unique_x[ii], 
-                    unique_z[ii], 
-                    unique_y[ii],
-                    label=f'{pdg_map[str(unique_pdgs[ii])]}',
-                    s=20 * unique_energy[ii]
-                )
+            scatter = axs.scatter(x, z, y, c=pdg_codes, s=sizes, cmap='tab10')
             axs.set_xlabel("x (mm)")
             axs.set_ylabel("z (mm)")
             axs.set_zlabel("y (mm)")
@@ -435,143 +940,57 @@ class NeutronCosmicDataset:
         else:
             fig, axs = plt.subplots(figsize=(8,6))
             if plot_type == 'xz':
-                for ii in range(len(unique_pdgs)):
-                    axs.scatter(
-                        unique_x[ii], 
-                        unique_z[ii], 
-                        label=f'{pdg_map[str(unique_pdgs[ii])]}',
-                        s=20 * unique_energy[ii]
-                    )
+                scatter = axs.scatter(x, z, c=pdg_codes, s=sizes, cmap='tab10')
                 axs.set_xlabel("x (mm)")
                 axs.set_ylabel("z (mm)")
             elif plot_type == 'yz':
-                for ii in range(len(unique_pdgs)):
-                    axs.scatter(
-                        unique_y[ii],
-                        unique_z[ii],
-                        label=f'{pdg_map[str(unique_pdgs[ii])]}',
-                        s=20 * unique_energy[ii]
-                    )
+                scatter = axs.scatter(y, z, c=pdg_codes, s=sizes, cmap='tab10')
                 axs.set_xlabel("y (mm)")
                 axs.set_ylabel("z (mm)")
             else:
-                for ii in range(len(unique_pdgs)):
-                    axs.scatter(
-                        unique_x[ii], 
-                        unique_y[ii],
-                        label=f'{pdg_map[str(unique_pdgs[ii])]}',
-                        s=20 * unique_energy[ii]
-                    )
+                scatter = axs.scatter(x, y, c=pdg_codes, s=sizes, cmap='tab10')
                 axs.set_xlabel("x (mm)")
                 axs.set_ylabel("y (mm)")
-        if show_active_tpc:
-            for i in range(len(self.active_tpc_lines)):
-                x = np.array([
-                    self.active_tpc_lines[i][0][0],
-                    self.active_tpc_lines[i][1][0]
-                ])
-                y = np.array([
-                    self.active_tpc_lines[i][0][1],
-                    self.active_tpc_lines[i][1][1]
-                ])
-                z = np.array([
-                    self.active_tpc_lines[i][0][2],
-                    self.active_tpc_lines[i][1][2]
-                ])
-                if plot_type == '3d':
-                    if i == 0:
-                        axs.plot(
-                            x,z,y,
-                            linestyle='--',color='b',
-                            label='Active TPC volume'
-                        )
-                    else:
-                        axs.plot(x,z,y,linestyle='--',color='b')
-                elif plot_type == 'xz':
-                    if i == 0:
-                        axs.plot(
-                            x,z,
-                            linestyle='--',color='b',
-                            label='Active TPC volume'
-                        )
-                    else:
-                        axs.plot(x,z,linestyle='--',color='b')
-                elif plot_type == 'yz':
-                    if i == 0:
-                        axs.plot(
-                            y,z,
-                            linestyle='--',color='b',
-                            label='Active TPC volume'
-                        )
-                    else:
-                        axs.plot(y,z,linestyle='--',color='b')
-                else:
-                    if i == 0:
-                        axs.plot(
-                            x,y,
-                            linestyle='--',color='b',
-                            label='Active TPC volume'
-                        )
-                    else:
-                        axs.plot(x,y,linestyle='--',color='b')
-        if show_cryostat:
-            for i in range(len(self.cryostat_lines)):
-                x = np.array([
-                    self.cryostat_lines[i][0][0],
-                    self.cryostat_lines[i][1][0]
-                ])
-                y = np.array([
-                    self.cryostat_lines[i][0][1],
-                    self.cryostat_lines[i][1][1]
-                ])
-                z = np.array([
-                    self.cryostat_lines[i][0][2],
-                    self.cryostat_lines[i][1][2]
-                ])
-                if plot_type == '3d':
-                    if i == 0:
-                        axs.plot(
-                            x,z,y,
-                            linestyle=':',color='g',
-                            label='Cryostat volume'
-                        )
-                    else:
-                        axs.plot(x,z,y,linestyle=':',color='g')
-                elif plot_type == 'xz':
-                    if i == 0:
-                        axs.plot(
-                            x,z,
-                            linestyle=':',color='g',
-                            label='Cryostat volume'
-                        )
-                    else:
-                        axs.plot(x,z,linestyle=':',color='g')
-                elif plot_type == 'yz':
-                    if i == 0:
-                        axs.plot(
-                            y,z,
-                            linestyle=':',color='g',
-                            label='Cryostat volume'
-                        )
-                    else:
-                        axs.plot(y,z,linestyle=':',color='g')
-                else:
-                    if i == 0:
-                        axs.plot(
-                            x,y,
-                            linestyle=':',color='g',
-                            label='Cryostat volume'
-                        )
-                    else:
-                        axs.plot(x,y,linestyle=':',color='g')
+        # the legend is built by hand since the single scatter carries
+        # every pdg species; only the first legend_cutoff species get an
+        # entry so busy events stay readable
+        legend_handles = [
+            plt.Line2D(
+                [], [], marker='o', linestyle='',
+                color=scatter.cmap(scatter.norm(code)),
+                label=f'{pdg_map[str(unique_pdgs[code])]}'
+            )
+            for code in range(min(len(unique_pdgs), legend_cutoff))
+        ]
+        self._draw_detector_boundaries(
+            axs, plot_type,
+            show_active_tpc=show_active_tpc,
+            show_cryostat=show_cryostat,
+        )
         axs.set_title(title)
-        plt.legend()
+        handles, labels = axs.get_legend_handles_labels()
+        plt.legend(handles=handles + legend_handles)
         plt.tight_layout()
         if save:
             plt.savefig(f'plots/{self.name}/events/mc_edep_{plot_type}_{event}.png')
         if show:
             plt.show()
 
+    def _ensure_buf(self,
+        num_voxels: int,
+    ):
+        """
+        Return a float32 (num_voxels,3) view into a reusable scratch
+        buffer, growing it geometrically on demand.  Once the buffer has
+        seen the largest event, per-event plotting stops allocating
+        coordinate arrays entirely.
+        """
+        if not hasattr(self, '_xyz_buf') or len(self._xyz_buf) < num_voxels:
+            self._xyz_buf = np.empty(
+                (num_voxels + num_voxels // 2 + 1, 3), dtype=np.float32
+            )
+        return self._xyz_buf[:num_voxels]
+
     def plot_mc_voxel_locations(self,
         event,
         plot_type:      str='3d',
@@ -581,48 +1000,43 @@ class NeutronCosmicDataset:
         title:          str='Example MC Voxel Locations',
         save:           bool=True,
         show:           bool=False,
+        backend:        str='matplotlib',
+        legend_cutoff:  int=10,
     ):
         if self.load_mc_voxels == False:
             self.logger.error(f"Dataset does not have 'mc_energy_deposits' products loaded! (i.e. 'self.load_mc_voxels' = {self.load_mc_voxels})")
             raise ValueError(f"Dataset does not have 'mc_energy_deposits' products loaded! (i.e. 'self.load_mc_voxels' = {self.load_mc_voxels})")
-        if event >= self.num_mc_voxel_events:
-            self.logger.error(f"Tried accessing element {event} of array with size {self.num_mc_voxel_events}!")
-            raise IndexError(f"Tried accessing element {event} of array with size {self.num_mc_voxel_events}!")
+        if backend not in ['matplotlib', 'vispy']:
+            self.logger.warning(f"Requested backend '{backend}' not allowed, using 'matplotlib'.")
+            backend = 'matplotlib'
+        if backend == 'vispy':
+            return self._plot_voxels_vispy(event, title=title, save=save, show=show)
+        # event indices are global; while iter_events streams chunks the
+        # resident voxel arrays start at voxel_event_offset
+        local_event = event - self.voxel_event_offset
+        if local_event < 0 or local_event >= self.num_mc_voxel_events:
+            self.logger.error(f"Tried accessing event {event} outside the resident chunk [{self.voxel_event_offset}, {self.voxel_event_offset + self.num_mc_voxel_events})!")
+            raise IndexError(f"Tried accessing event {event} outside the resident chunk [{self.voxel_event_offset}, {self.voxel_event_offset + self.num_mc_voxel_events})!")
         if plot_type not in ['3d', 'xy', 'xz', 'yz']:
             self.logger.warning(f"Requested plot type '{plot_type}' not allowed, using '3d'.")
             plot_type = '3d'
         if capture_location not in ['world', 'cryostat', 'tpc']:
             self.logger.warning(f"Requested capture location '{capture_location}' not allowed, using 'tpc'.")
             capture_location = 'tpc'
-        # gather x, y, z values
-        voxels = self.mc_voxels['voxels'][event]
-        x = np.array([voxel[0] for voxel in voxels])
-        y = np.array([voxel[1] for voxel in voxels])
-        z = np.array([voxel[2] for voxel in voxels])
-        labels = np.array(self.mc_voxels['labels'][event])
-        energy = self.mc_voxels['energy'][event]
-        edep_idxs = self.mc_voxels['edep_idxs'][event]
-        unique_labels = np.unique(labels)
-        unique_x = []
-        unique_y = []
-        unique_z = []
-        unique_energy = []
-        for item in unique_labels:
-            unique_x.append(x[(labels == item)])
-            unique_y.append(y[(labels == item)])
-            unique_z.append(z[(labels == item)])
-            unique_energy.append(energy[(labels == item)])
+        # gather x, y, z values from the sparse layout, copying into the
+        # reusable scratch buffer rather than allocating per event
+        coords, labels, energy = self.event_voxels(local_event)
+        xyz = self._ensure_buf(len(coords))
+        np.copyto(xyz, coords)
+        x = xyz[:,0]
+        y = xyz[:,1]
+        z = xyz[:,2]
+        # one scatter colored by label code instead of one artist per label
+        unique_labels, label_codes = np.unique(labels, return_inverse=True)
         if plot_type == '3d':
             fig = plt.figure(figsize=(8,6))
             axs = fig.add_subplot(projection='3d')
-            for ii in range(len(unique_labels)):
-                axs.scatter(
-                    unique_x[ii], 
-                    unique_z[ii], 
-                    unique_y[ii],
-                    label=f'{unique_labels[ii]}',
-                    #s=20 * unique_energy[ii]
-                )
+            scatter = axs.scatter(x, z, y, c=label_codes, cmap='tab10')
             axs.set_xlabel("x (mm)")
             axs.set_ylabel("z (mm)")
             axs.set_zlabel("y (mm)")
@@ -630,183 +1044,370 @@ class NeutronCosmicDataset:
         else:
             fig, axs = plt.subplots(figsize=(8,6))
             if plot_type == 'xz':
-                for ii in range(len(unique_labels)):
-                    axs.scatter(
-                        unique_x[ii], 
-                        unique_z[ii], 
-                        label=f'{unique_labels[ii]}',
-                        #s=20 * unique_energy[ii]
-                    )
+                scatter = axs.scatter(x, z, c=label_codes, cmap='tab10')
                 axs.set_xlabel("x (mm)")
                 axs.set_ylabel("z (mm)")
             elif plot_type == 'yz':
-                for ii in range(len(unique_labels)):
-                    axs.scatter(
-                        unique_y[ii],
-                        unique_z[ii],
-                        label=f'{unique_labels[ii]}',
-                        #s=20 * unique_energy[ii]
-                    )
+                scatter = axs.scatter(y, z, c=label_codes, cmap='tab10')
                 axs.set_xlabel("y (mm)")
                 axs.set_ylabel("z (mm)")
             else:
-                for ii in range(len(unique_labels)):
-                    axs.scatter(
-                        unique_x[ii], 
-                        unique_y[ii],
-                        label=f'{unique_labels[ii]}',
-                        #s=20 * unique_energy[ii]
-                    )
+                scatter = axs.scatter(x, y, c=label_codes, cmap='tab10')
                 axs.set_xlabel("x (mm)")
                 axs.set_ylabel("y (mm)")
-        # if show_active_tpc:
-        #     for i in range(len(self.active_tpc_lines)):
-        #         x = np.array([
-        #             self.active_tpc_lines[i][0][0],
-        #             self.active_tpc_lines[i][1][0]
-        #         ])
-        #         y = np.array([
-        #             self.active_tpc_lines[i][0][1],
-        #             self.active_tpc_lines[i][1][1]
-        #         ])
-        #         z = np.array([
-        #             self.active_tpc_lines[i][0][2],
-        #             self.active_tpc_lines[i][1][2]
-        #         ])
-        #         if plot_type == '3d':
-        #             if i == 0:
-        #                 axs.plot(
-        #                     x,z,y,
-        #                     linestyle='--',color='b',
-        #                     label='Active TPC volume'
-        #                 )
-        #             else:
-        #                 axs.plot(x,z,y,linestyle='--',color='b')
-        #         elif plot_type == 'xz':
-        #             if i == 0:
-        #                 axs.plot(
-        #                     x,z,
-        #                     linestyle='--',color='b',
-        #                     label='Active TPC volume'
-        #                 )
-        #             else:
-        #                 axs.plot(x,z,linestyle='--',color='b')
-        #         elif plot_type == 'yz':
-        #             if i == 0:
-        #                 axs.plot(
-        #                     y,z,
-        #                     linestyle='--',color='b',
-        #                     label='Active TPC volume'
-        #                 )
-        #             else:
-        #                 axs.plot(y,z,linestyle='--',color='b')
-        #         else:
-        #             if i == 0:
-        #                 axs.plot(
-        #                     x,y,
-        #                     linestyle='--',color='b',
-        #                     label='Active TPC volume'
-        #                 )
-        #             else:
-        #                 axs.plot(x,y,linestyle='--',color='b')
-        # if show_cryostat:
-        #     for i in range(len(self.cryostat_lines)):
-        #         x = np.array([
-        #             self.cryostat_lines[i][0][0],
-        #             self.cryostat_lines[i][1][0]
-        #         ])
-        #         y = np.array([
-        #             self.cryostat_lines[i][0][1],
-        #             self.cryostat_lines[i][1][1]
-        #         ])
-        #         z = np.array([
-        #             self.cryostat_lines[i][0][2],
-        #             self.cryostat_lines[i][1][2]
-        #         ])
-        #         if plot_type == '3d':
-        #             if i == 0:
-        #                 axs.plot(
-        #                     x,z,y,
-        #                     linestyle=':',color='g',
-        #                     label='Cryostat volume'
-        #                 )
-        #             else:
-        #                 axs.plot(x,z,y,linestyle=':',color='g')
-        #         elif plot_type == 'xz':
-        #             if i == 0:
-        #                 axs.plot(
-        #                     x,z,
-        #                     linestyle=':',color='g',
-        #                     label='Cryostat volume'
-        #                 )
-        #             else:
-        #                 axs.plot(x,z,linestyle=':',color='g')
-        #         elif plot_type == 'yz':
-        #             if i == 0:
-        #                 axs.plot(
-        #                     y,z,
-        #                     linestyle=':',color='g',
-        #                     label='Cryostat volume'
-        #                 )
-        #             else:
-        #                 axs.plot(y,z,linestyle=':',color='g')
-        #         else:
-        #             if i == 0:
-        #                 axs.plot(
-        #                     x,y,
-        #                     linestyle=':',color='g',
-        #                     label='Cryostat volume'
-        #                 )
-        #             else:
-        #                 axs.plot(x,y,linestyle=':',color='g')
+        legend_handles = [
+            plt.Line2D(
+                [], [], marker='o', linestyle='',
+                color=scatter.cmap(scatter.norm(code)),
+                label=f'{unique_labels[code]}'
+            )
+            for code in range(min(len(unique_labels), legend_cutoff))
+        ]
+        self._draw_detector_boundaries(
+            axs, plot_type,
+            show_active_tpc=show_active_tpc,
+            show_cryostat=show_cryostat,
+        )
         axs.set_title(title)
-        plt.legend()
+        handles, labels = axs.get_legend_handles_labels()
+        plt.legend(handles=handles + legend_handles)
         plt.tight_layout()
         if save:
             plt.savefig(f'plots/{self.name}/events/mc_voxels_{plot_type}_{event}.png')
         if show:
             plt.show()
 
+    def _plot_voxels_vispy(self,
+        event:  int,
+        title:  str='Example MC Voxel Locations',
+        save:   bool=True,
+        show:   bool=False,
+    ):
+        """
+        Render the voxels of an event through a cached VisPy canvas.  The
+        GPU-rasterized Markers visual stays interactive up to ~10^6 points,
+        and reusing one canvas across events reduces the per-event cost to
+        a single set_data upload.
+        """
+        try:
+            from vispy import scene
+            from vispy import io as vispy_io
+        except ImportError:
+            self.logger.error("Requested backend 'vispy' but vispy is not installed!")
+            raise
+        # event indices are global; while iter_events streams chunks the
+        # resident voxel arrays start at voxel_event_offset
+        local_event = event - self.voxel_event_offset
+        if local_event < 0 or local_event >= self.num_mc_voxel_events:
+            self.logger.error(f"Tried accessing event {event} outside the resident chunk [{self.voxel_event_offset}, {self.voxel_event_offset + self.num_mc_voxel_events})!")
+            raise IndexError(f"Tried accessing event {event} outside the resident chunk [{self.voxel_event_offset}, {self.voxel_event_offset + self.num_mc_voxel_events})!")
+        if not hasattr(self, '_vispy_canvas'):
+            self._vispy_canvas = scene.SceneCanvas(
+                keys='interactive', size=(800,600), show=show
+            )
+            self._vispy_view = self._vispy_canvas.central_widget.add_view()
+            self._vispy_view.camera = 'turntable'
+            self._vispy_markers = scene.visuals.Markers(
+                parent=self._vispy_view.scene
+            )
+        coords, labels, energy = self.event_voxels(local_event)
+        self._vispy_markers.set_data(coords.astype(np.float32), size=2)
+        self._vispy_canvas.title = title
+        if save:
+            vispy_io.write_png(
+                f'plots/{self.name}/events/mc_voxels_3d_{event}.png',
+                self._vispy_canvas.render()
+            )
+        if show:
+            self._vispy_canvas.show()
+
+    def plot_mc_voxel_locations_batch(self,
+        events=None,
+        plot_type:      str='3d',
+        title:          str='Example MC Voxel Locations',
+        save:           bool=True,
+        show:           bool=False,
+    ):
+        """
+        Plot the voxels from a batch of events in a single figure.  The
+        coordinates are concatenated into one (M,3) float32 array and handed
+        to a single scatter call, so the artist overhead stays O(1) rather
+        than O(num_events * num_voxels).
+        """
+        if self.load_mc_voxels == False:
+            self.logger.error(f"Dataset does not have 'mc_voxels' products loaded! (i.e. 'self.load_mc_voxels' = {self.load_mc_voxels})")
+            raise ValueError(f"Dataset does not have 'mc_voxels' products loaded! (i.e. 'self.load_mc_voxels' = {self.load_mc_voxels})")
+        if plot_type not in ['3d', 'xy', 'xz', 'yz']:
+            self.logger.warning(f"Requested plot type '{plot_type}' not allowed, using '3d'.")
+            plot_type = '3d'
+        if self._num_mc_voxel_events is None:
+            self._load_mc_voxels()
+        if events is None:
+            events = range(
+                self.voxel_event_offset,
+                self.voxel_event_offset + self.num_mc_voxel_events,
+            )
+        events = list(events)
+        # event indices are global; while iter_events streams chunks the
+        # resident voxel arrays start at voxel_event_offset
+        local_events = [event - self.voxel_event_offset for event in events]
+        coords = np.concatenate([
+            self.voxel_coords[self.voxel_offsets[event]:self.voxel_offsets[event+1]]
+            for event in local_events
+        ]).astype(np.float32)
+        x, y, z = coords[:,0], coords[:,1], coords[:,2]
+        if plot_type == '3d':
+            fig = plt.figure(figsize=(8,6))
+            axs = fig.add_subplot(projection='3d')
+            axs.scatter(x, z, y, s=1)
+            axs.set_xlabel("x (mm)")
+            axs.set_ylabel("z (mm)")
+            axs.set_zlabel("y (mm)")
+        else:
+            fig, axs = plt.subplots(figsize=(8,6))
+            if plot_type == 'xz':
+                axs.scatter(x, z, s=1)
+                axs.set_xlabel("x (mm)")
+                axs.set_ylabel("z (mm)")
+            elif plot_type == 'yz':
+                axs.scatter(y, z, s=1)
+                axs.set_xlabel("y (mm)")
+                axs.set_ylabel("z (mm)")
+            else:
+                axs.scatter(x, y, s=1)
+                axs.set_xlabel("x (mm)")
+                axs.set_ylabel("y (mm)")
+        axs.set_title(title)
+        plt.tight_layout()
+        if save:
+            # key the filename on the event range so successive chunks
+            # from iter_events do not overwrite each other
+            plt.savefig(f'plots/{self.name}/mc_voxels_batch_{plot_type}_{events[0]}_{events[-1]}.png')
+        if show:
+            plt.show()
+
+    def plot_mc_edep_locations_batch(self,
+        events=None,
+        show_active_tpc:bool=True,
+        show_cryostat:  bool=True,
+        title:          str='Example MC Edep Locations',
+        save:           bool=True,
+        show:           bool=False,
+    ):
+        """
+        Plot the energy deposits from a batch of events in a single 3d
+        figure, colored by event.  The positions are concatenated into
+        one (M,3) array with a matching repeated color array and handed
+        to a single scatter call, so looping callers pay one matplotlib
+        artist for the whole batch instead of one per event.
+        """
+        if self.load_mc_edeps == False:
+            self.logger.error(f"Dataset does not have 'mc_energy_deposits' products loaded! (i.e. 'self.load_mc_edeps' = {self.load_mc_edeps})")
+            raise ValueError(f"Dataset does not have 'mc_energy_deposits' products loaded! (i.e. 'self.load_mc_edeps' = {self.load_mc_edeps})")
+        if events is None:
+            events = range(self.num_mc_edep_events)
+        events = list(events)
+        x = np.concatenate([np.asarray(self.mc_edeps['edep_x'][event]) for event in events])
+        y = np.concatenate([np.asarray(self.mc_edeps['edep_y'][event]) for event in events])
+        z = np.concatenate([np.asarray(self.mc_edeps['edep_z'][event]) for event in events])
+        colors = np.repeat(
+            np.arange(len(events)),
+            [len(self.mc_edeps['edep_x'][event]) for event in events],
+        )
+        fig = plt.figure(figsize=(8,6))
+        axs = fig.add_subplot(projection='3d')
+        axs.scatter(x, z, y, c=colors, cmap='tab20', s=1)
+        axs.set_xlabel("x (mm)")
+        axs.set_ylabel("z (mm)")
+        axs.set_zlabel("y (mm)")
+        self._draw_detector_boundaries(
+            axs, '3d',
+            show_active_tpc=show_active_tpc,
+            show_cryostat=show_cryostat,
+        )
+        axs.set_title(title)
+        plt.legend()
+        plt.tight_layout()
+        if save:
+            plt.savefig(f'plots/{self.name}/mc_edeps_batch_3d.png')
+        if show:
+            plt.show()
+
+    def plot_all_events(self,
+        n_workers:      int=os.cpu_count(),
+        show_active_tpc:bool=True,
+        show_cryostat:  bool=True,
+    ):
+        """
+        Render every event's voxel cloud to plots/<name>/events/ using a
+        pool of worker processes.  Rendering a figure is pure CPU work,
+        so processes sidestep the GIL and the batch scales close to
+        linearly with core count.  Each task carries only the sliced
+        per-event coordinates (tens of kB), not the whole dataset.
+        """
+        if self.load_mc_voxels == False:
+            self.logger.error(f"Dataset does not have 'mc_voxels' products loaded! (i.e. 'self.load_mc_voxels' = {self.load_mc_voxels})")
+            raise ValueError(f"Dataset does not have 'mc_voxels' products loaded! (i.e. 'self.load_mc_voxels' = {self.load_mc_voxels})")
+        self.logger.info(f"Rendering {self.num_mc_voxel_events} events with {n_workers} workers.")
+        tpc_lines      = self.active_tpc_lines if show_active_tpc else None
+        cryostat_lines = self.cryostat_lines if show_cryostat else None
+        tasks = []
+        for event in range(self.num_mc_voxel_events):
+            coords, labels, energy = self.event_voxels(event)
+            tasks.append((
+                self.name, event,
+                coords[:,0], coords[:,1], coords[:,2],
+                tpc_lines, cryostat_lines,
+            ))
+        with ProcessPoolExecutor(n_workers) as executor:
+            list(executor.map(_render_event, tasks))
+
+    def _volume_mask(self,
+        x,
+        y,
+        z,
+        capture_location:   str='tpc',
+    ):
+        # boolean mask selecting points inside the requested volume
+        if capture_location == 'world':
+            return (
+                (x < self.world_x[1]) & (x > self.world_x[0]) &
+                (y < self.world_y[1]) & (y > self.world_y[0]) &
+                (z < self.world_z[1]) & (z > self.world_z[0])
+            )
+        elif capture_location == 'cryostat':
+            return (
+                (x < self.cryo_x[1]) & (x > self.cryo_x[0]) &
+                (y < self.cryo_y[1]) & (y > self.cryo_y[0]) &
+                (z < self.cryo_z[1]) & (z > self.cryo_z[0])
+            )
+        return (
+            (x < self.tpc_x[1]) & (x > self.tpc_x[0]) &
+            (y < self.tpc_y[1]) & (y > self.tpc_y[0]) &
+            (z < self.tpc_z[1]) & (z > self.tpc_z[0])
+        )
+
+    def plot_all_projections(self,
+        event:          int,
+        capture_location:str='tpc',
+        show_active_tpc:bool=True,
+        show_cryostat:  bool=True,
+        title:          str='Example MC Projections',
+        save:           bool=True,
+        show:           bool=False,
+    ):
+        """
+        Draw the capture locations and energy deposits of one event as a
+        2x4 grid (3d/xy/xz/yz per row) in a single figure.  The per-event
+        coordinate arrays are sliced once and shared by every subplot, so
+        producing all eight views costs one figure instead of eight
+        separate plot_* calls.
+        """
+        if self.load_neutrons == False:
+            self.logger.error(f"Dataset does not have 'neutron' products loaded! (i.e. 'self.load_neutrons' = {self.load_neutrons})")
+            raise ValueError(f"Dataset does not have 'neutron' products loaded! (i.e. 'self.load_neutrons' = {self.load_neutrons})")
+        if self.load_mc_edeps == False:
+            self.logger.error(f"Dataset does not have 'mc_energy_deposits' products loaded! (i.e. 'self.load_mc_edeps' = {self.load_mc_edeps})")
+            raise ValueError(f"Dataset does not have 'mc_energy_deposits' products loaded! (i.e. 'self.load_mc_edeps' = {self.load_mc_edeps})")
+        if event >= self.num_neutron_events:
+            self.logger.error(f"Tried accessing element {event} of array with size {self.num_neutron_events}!")
+            raise IndexError(f"Tried accessing element {event} of array with size {self.num_neutron_events}!")
+        if capture_location not in ['world', 'cryostat', 'tpc']:
+            self.logger.warning(f"Requested capture location '{capture_location}' not allowed, using 'tpc'.")
+            capture_location = 'tpc'
+        # slice the coordinate arrays once per row of subplots
+        rows = []
+        for row_label, (x, y, z) in [
+            ('captures', (
+                self.neutron['neutron_capture_x'][event],
+                self.neutron['neutron_capture_y'][event],
+                self.neutron['neutron_capture_z'][event],
+            )),
+            ('mc edeps', (
+                self.mc_edeps['edep_x'][event],
+                self.mc_edeps['edep_y'][event],
+                self.mc_edeps['edep_z'][event],
+            )),
+        ]:
+            mask = self._volume_mask(x, y, z, capture_location)
+            rows.append((row_label, x[mask], y[mask], z[mask]))
+        fig = plt.figure(figsize=(16,8))
+        for row, (row_label, x, y, z) in enumerate(rows):
+            axs = fig.add_subplot(2, 4, 4*row + 1, projection='3d')
+            axs.scatter(x, z, y, s=2)
+            axs.set_xlabel("x (mm)")
+            axs.set_ylabel("z (mm)")
+            axs.set_zlabel("y (mm)")
+            axs.set_title(f'{row_label} (3d)')
+            self._draw_detector_boundaries(
+                axs, '3d',
+                show_active_tpc=show_active_tpc,
+                show_cryostat=show_cryostat,
+            )
+            projections = [
+                ('xy', x, y, "x (mm)", "y (mm)"),
+                ('xz', x, z, "x (mm)", "z (mm)"),
+                ('yz', y, z, "y (mm)", "z (mm)"),
+            ]
+            for col, (plot_type, a, b, a_label, b_label) in enumerate(projections, start=2):
+                axs = fig.add_subplot(2, 4, 4*row + col)
+                axs.scatter(a, b, s=2)
+                axs.set_xlabel(a_label)
+                axs.set_ylabel(b_label)
+                axs.set_title(f'{row_label} ({plot_type})')
+                self._draw_detector_boundaries(
+                    axs, plot_type,
+                    show_active_tpc=show_active_tpc,
+                    show_cryostat=show_cryostat,
+                )
+        fig.suptitle(title)
+        plt.tight_layout()
+        if save:
+            plt.savefig(f'plots/{self.name}/events/projections_{event}.png')
+        if show:
+            plt.show()
+
     def fit_depth_exponential(self,
         num_bins:   int=100,
         save:       bool=True,
         show:       bool=False
     ):
-        y_pos = np.concatenate(
-            [yi for yi in self.neutron['neutron_capture_y']]
-        ).flatten()
+        # the flat capture positions are concatenated once at load time
+        y_pos = self.capture_y
         mask = ((y_pos < self.tpc_y[1]) & (y_pos > self.tpc_y[0]))
         y_pos = y_pos[mask]
-        # normalize positions
-        y_max = np.max(y_pos)
-        depth = np.abs(y_max - y_pos)
-        # fit histogram
-        y_hist, y_edges = np.histogram(depth, bins=num_bins)
-        hist_sum = sum(y_hist)
-        y_hist = y_hist.astype(float) / hist_sum
+        # normalize positions and histogram the depths in one fused pass
+        y_max = float(np.max(y_pos))
+        y_hist, mid_points = _depth_hist(y_pos, y_max, num_bins)
+        hist_sum = y_hist.sum()
+        # float32 is ample for normalized bin heights and halves the
+        # working set of the fit vectors
+        y_hist = y_hist.astype(np.float32) / np.float32(hist_sum)
         # determine cumulative hist
-        cum_hist = [y_hist[0]]
-        for ii in range(1,len(y_hist)):
-            cum_hist.append(y_hist[ii]+cum_hist[-1])
-        # arrange mid points for fit
-        mid_points = np.array([
-            y_edges[ii] + (y_edges[ii+1]-y_edges[ii])/2. 
-            for ii in range(len(y_hist))
-        ])
-        # fit to logarithm
-        exp_fit = sp.optimize.curve_fit(
-            lambda t,a,b: a*np.exp(-b*t),   # decaying exponential
-            mid_points, 
-            y_hist
+        cum_hist = np.cumsum(y_hist)
+        # fit to logarithm: log(y) = log(a) - b*t is linear, so a weighted
+        # least-squares line replaces the iterative curve_fit entirely,
+        # with sqrt(count) weights approximating the Poisson errors
+        nonzero = y_hist > 0
+        slope, intercept = np.polyfit(
+            mid_points[nonzero],
+            np.log(y_hist[nonzero]),
+            1,
+            w=np.sqrt(y_hist[nonzero] * hist_sum)
         )
-        exp_function = exp_fit[0][0] * np.exp(-exp_fit[0][1] * mid_points)
+        amplitude = np.exp(intercept)
+        decay = -slope
+        # keep the coefficients around so analyses can reuse the fit
+        # without re-running the histogram
+        self.depth_fit = {'amplitude': amplitude, 'decay': decay}
+        exp_function = amplitude * np.exp(-decay * mid_points)
         # plot the results
         fig, axs1 = plt.subplots(figsize=(8,6))
         axs1.scatter(mid_points, y_hist, label='hist')
         axs1.plot(
             mid_points, 
             exp_function, 
-            label=rf'fit ($\sim\exp[-{round(exp_fit[0][1],3)}\, \Delta y]$)'
+            label=rf'fit ($\sim\exp[-{round(decay,3)}\, \Delta y]$)'
         )
         axs1.set_xlabel(r'depth - $\Delta y$ - (mm)')
         axs1.set_ylabel('density (height/sum)')
@@ -825,7 +1426,58 @@ class NeutronCosmicDataset:
             plt.savefig(f'plots/{self.name}/depth_exponential.png')
         if show:
             plt.show()
-    
+        return amplitude, decay
+
+    def _silverman_bandwidth(self,
+        samples,
+        bin_width,
+    ):
+        # Silverman's rule bandwidth, converted into bin units
+        return 1.06 * np.std(samples) * len(samples)**(-1./5.) / bin_width
+
+    def _fft_kde(self,
+        a,
+        b,
+        num_bins:   int=200,
+        backend:    str='numpy',
+    ):
+        """
+        Gridded Gaussian KDE: histogram the samples onto a 2d grid and
+        convolve with a Gaussian kernel via FFT.  This costs
+        O(N + num_bins^2 log(num_bins)) rather than the O(N * num_bins^2)
+        of an exact KDE, with per-axis bandwidths from Silverman's rule.
+        With backend='cuda' the histogram and convolution run on the GPU
+        through cupy and only the gridded density comes back to the host.
+        """
+        if backend == 'cuda':
+            try:
+                import cupy as xp
+                from cupyx.scipy import signal
+            except ImportError:
+                self.logger.error("The 'cupy' package is required for backend='cuda' but is not installed!")
+                raise ImportError("The 'cupy' package is required for backend='cuda' but is not installed!")
+            a = xp.asarray(a)
+            b = xp.asarray(b)
+        else:
+            xp = np
+            signal = sp.signal
+        hist, a_edges, b_edges = xp.histogram2d(a, b, bins=num_bins)
+        bw_a = float(self._silverman_bandwidth(a, a_edges[1] - a_edges[0]))
+        bw_b = float(self._silverman_bandwidth(b, b_edges[1] - b_edges[0]))
+        half_a = max(1, int(np.ceil(4. * bw_a)))
+        half_b = max(1, int(np.ceil(4. * bw_b)))
+        ka = xp.arange(-half_a, half_a + 1)
+        kb = xp.arange(-half_b, half_b + 1)
+        kernel = xp.exp(
+            -0.5 * (ka[:,None] / bw_a)**2
+            -0.5 * (kb[None,:] / bw_b)**2
+        )
+        kernel /= kernel.sum()
+        density = signal.fftconvolve(hist, kernel, mode='same')
+        if backend == 'cuda':
+            return xp.asnumpy(density), xp.asnumpy(a_edges), xp.asnumpy(b_edges)
+        return density, a_edges, b_edges
+
     def plot_capture_density(self,
         plot_type:      str='xy',
         density_type:   str='kde',
@@ -833,6 +1485,7 @@ class NeutronCosmicDataset:
         title:  str='Example MC Capture Locations',
         save:   bool=True,
         show:   bool=False,
+        backend:str='numpy',
     ):
         if self.load_neutrons == False:
             self.logger.error(f"Dataset does not have 'neutron' products loaded! (i.e. 'self.load_neutrons' = {self.load_neutrons})")
@@ -843,22 +1496,16 @@ class NeutronCosmicDataset:
         if density_type not in ['scatter', 'kde', 'hist', 'hex', 'reg', 'resid']:
             self.logger.warning(f"Requested density type {density_type} not allowed, using 'kde'.")
             density_type = 'kde'
+        if backend not in ['numpy', 'cuda']:
+            self.logger.warning(f"Requested backend '{backend}' not allowed, using 'numpy'.")
+            backend = 'numpy'
         if capture_location not in ['world', 'cryostat', 'tpc']:
             self.logger.warning(f"Requested capture location '{capture_location}' not allowed, using 'tpc'.")
             capture_location = 'tpc'
-        # gather x, y, z values
-        x = self.neutron['neutron_capture_x']
-        y = self.neutron['neutron_capture_y']
-        z = self.neutron['neutron_capture_z']
-        x = np.concatenate([
-            xi for xi in x
-        ]).flatten()
-        y = np.concatenate([
-            yi for yi in y
-        ]).flatten()
-        z = np.concatenate([
-            zi for zi in z
-        ]).flatten()
+        # the flat capture positions are concatenated once at load time
+        x = self.capture_x
+        y = self.capture_y
+        z = self.capture_z
         if capture_location == 'world':
             mask = (
                 (x < self.world_x[1]) & (x > self.world_x[0]) &
@@ -881,17 +1528,37 @@ class NeutronCosmicDataset:
         y = y[mask]
         z = z[mask]
         if plot_type == 'xz':
-            sns.jointplot(x=x, y=z, kind=density_type, palette='crest')
-            plt.xlabel("x (mm)")
-            plt.ylabel("z (mm)")
+            a, b = x, z
+            a_label, b_label = "x (mm)", "z (mm)"
         elif plot_type == 'yz':
-            sns.jointplot(x=y, y=z, kind=density_type, palette='crest')
-            plt.xlabel("y (mm)")
-            plt.ylabel("z (mm)")
+            a, b = y, z
+            a_label, b_label = "y (mm)", "z (mm)"
+        else:
+            a, b = x, y
+            a_label, b_label = "x (mm)", "y (mm)"
+        if density_type == 'kde':
+            # gridded KDE rather than the exact O(N_samples * N_grid)
+            # gaussian_kde evaluation; at small sample counts a blurred
+            # histogram is indistinguishable from the KDE and cheaper
+            # still than the FFT convolution
+            if len(a) >= 10000 or backend == 'cuda':
+                density, a_edges, b_edges = self._fft_kde(a, b, backend=backend)
+            else:
+                density, a_edges, b_edges = np.histogram2d(a, b, bins=200)
+                density = sp.ndimage.gaussian_filter(
+                    density,
+                    sigma=(
+                        self._silverman_bandwidth(a, a_edges[1] - a_edges[0]),
+                        self._silverman_bandwidth(b, b_edges[1] - b_edges[0]),
+                    )
+                )
+            fig, axs = plt.subplots(figsize=(8,6))
+            mesh = axs.pcolormesh(a_edges, b_edges, density.T, cmap='viridis')
+            fig.colorbar(mesh, ax=axs, label='density')
         else:
-            sns.jointplot(x=x, y=y, kind=density_type, palette='crest')
-            plt.xlabel("x (mm)")
-            plt.ylabel("y (mm)")
+            sns.jointplot(x=a, y=b, kind=density_type, palette='crest')
+        plt.xlabel(a_label)
+        plt.ylabel(b_label)
         plt.title(title)
         plt.tight_layout()
         if save != '':
@@ -899,15 +1566,175 @@ class NeutronCosmicDataset:
         if show:
             plt.show()
 
+    def _tile_sort_voxels(self,
+        tile_size:  int=8,
+    ):
+        """
+        Reorder each event's voxels so that voxels sharing a cubic
+        (tile_size)^3 tile sit contiguously in the flat arrays, and
+        enumerate the corners of the non-empty tiles.  Consumers can then
+        walk the grid tile by tile, touching only occupied tiles and
+        keeping each tile's voxels cache resident.  Returns the stacked
+        tile corners and the global tile offsets into the flat arrays.
+        """
+        tile_corners = []
+        tile_counts = []
+        for event in range(self.num_mc_voxel_events):
+            begin = self.voxel_offsets[event]
+            end   = self.voxel_offsets[event+1]
+            coords = self.voxel_coords[begin:end]
+            tiles = coords // tile_size
+            shifted = tiles.astype(np.int64) + 2**20
+            # Morton codes keep neighbouring tiles adjacent in the sorted
+            # order, so consumers walking the tiles also walk the detector
+            keys = self._morton_encode(shifted[:,0], shifted[:,1], shifted[:,2])
+            order = np.argsort(keys, kind='stable')
+            # reorder the flat arrays so tile members are contiguous;
+            # the per-voxel deposit indices ride along so the
+            # voxel-to-deposit mapping stays row-aligned
+            self.voxel_coords[begin:end] = coords[order]
+            self.voxel_labels[begin:end] = self.voxel_labels[begin:end][order]
+            self.voxel_energy[begin:end] = self.voxel_energy[begin:end][order]
+            self.voxel_edep_idxs[begin:end] = self.voxel_edep_idxs[begin:end][order]
+            starts = np.flatnonzero(
+                np.concatenate(([True], np.diff(keys[order]) != 0))
+            )
+            tile_corners.append(tiles[order][starts] * tile_size)
+            tile_counts.append(
+                np.diff(np.concatenate((starts, [len(keys)])))
+            )
+        tile_corners = np.concatenate(tile_corners)
+        tile_counts = np.concatenate(tile_counts)
+        tile_offsets = np.zeros(len(tile_counts) + 1, dtype=np.int64)
+        np.cumsum(tile_counts, out=tile_offsets[1:])
+        return tile_corners, tile_offsets
+
+    # order in which the arrays are streamed through a compressed file;
+    # NeutronUNetDataset reads them back in the same order
+    unet_array_order = [
+        'coords', 'labels', 'energy',
+        'edep_idxs', 'offsets', 'tiles', 'tile_offsets',
+    ]
+
     def generate_unet_training(self,
-        output_file:    str
+        output_file:    str,
+        memmap:         bool=False,
+        tile_size:      int=8,
+        compression:    str=None,
     ):
         self.logger.info(f"Attempting to generate voxel dataset {output_file}.")
-        np.savez(output_file,
-            coords= self.mc_voxels['voxels'],
-            feats = self.discrete_voxel_values,
-            labels= self.mc_voxels['labels'],
-            energy= self.mc_voxels['energy'],
-            edep_idxs= self.mc_voxels['edep_idxs'],
-        )
+        if self._num_mc_voxel_events is None:
+            self._load_mc_voxels()
+        # group voxels into cubic tiles so downstream sweeps only touch
+        # occupied tiles
+        tile_corners, tile_offsets = self._tile_sort_voxels(tile_size)
+        if output_file.endswith('.h5'):
+            # stream each event's slice into chunked hdf5 datasets, so
+            # peak memory stays at one event regardless of the total
+            # voxel count, and training can read the file lazily
+            try:
+                import h5py
+            except ImportError:
+                self.logger.error("The 'h5py' package is required for '.h5' output but is not installed!")
+                raise ImportError("The 'h5py' package is required for '.h5' output but is not installed!")
+            total = len(self.voxel_coords)
+            chunk = min(total, 1 << 16)
+            with h5py.File(output_file, 'w') as output:
+                coords = output.create_dataset(
+                    'coords', shape=(total,3), dtype='i2', chunks=(chunk,3),
+                )
+                labels = output.create_dataset(
+                    'labels', shape=(total,),
+                    dtype=self.voxel_labels.dtype, chunks=(chunk,),
+                )
+                energy = output.create_dataset(
+                    'energy', shape=(total,), dtype='f2', chunks=(chunk,),
+                )
+                edep_idxs = output.create_dataset(
+                    'edep_idxs', shape=(total,),
+                    dtype=h5py.vlen_dtype(np.int64), chunks=(chunk,),
+                )
+                for event in range(self.num_mc_voxel_events):
+                    begin = self.voxel_offsets[event]
+                    end   = self.voxel_offsets[event+1]
+                    event_coords, event_labels, event_energy = self.event_voxels(event)
+                    coords[begin:end] = event_coords
+                    labels[begin:end] = event_labels
+                    energy[begin:end] = event_energy
+                    edep_idxs[begin:end] = self.voxel_edep_idxs[begin:end]
+                output.create_dataset('offsets', data=self.voxel_offsets)
+                output.create_dataset('tiles', data=tile_corners)
+                output.create_dataset('tile_offsets', data=tile_offsets)
+            self.logger.info(f"Saved voxel dataset to {output_file}.")
+            return
+        if memmap:
+            # write each flat array straight into a pre-sized .npy memmap,
+            # filled event by event, so the writer never stages the whole
+            # dataset through an in-memory zip buffer and training can
+            # mmap-read the arrays back
+            base = output_file.replace('.npz', '')
+            total = len(self.voxel_coords)
+            # voxel indices fit comfortably in int16 and MeV-scale energies
+            # in float16, which halves the bytes on disk and in the
+            # training input pipeline
+            coords = np.lib.format.open_memmap(
+                base + '_coords.npy', mode='w+',
+                dtype=np.int16, shape=(total,3),
+            )
+            labels = np.lib.format.open_memmap(
+                base + '_labels.npy', mode='w+',
+                dtype=self.voxel_labels.dtype, shape=(total,),
+            )
+            energy = np.lib.format.open_memmap(
+                base + '_energy.npy', mode='w+',
+                dtype=np.float16, shape=(total,),
+            )
+            for event in range(self.num_mc_voxel_events):
+                begin = self.voxel_offsets[event]
+                end   = self.voxel_offsets[event+1]
+                event_coords, event_labels, event_energy = self.event_voxels(event)
+                coords[begin:end] = event_coords
+                labels[begin:end] = event_labels
+                energy[begin:end] = event_energy
+            coords.flush()
+            labels.flush()
+            energy.flush()
+            np.save(base + '_offsets.npy', self.voxel_offsets)
+            # ragged object arrays cannot be memmapped, so the per-voxel
+            # deposit indices go out as a plain pickled npy alongside
+            np.save(base + '_edep_idxs.npy', self.voxel_edep_idxs)
+            np.save(base + '_tiles.npy', tile_corners)
+            np.save(base + '_tile_offsets.npy', tile_offsets)
+        else:
+            # sparse COO layout: flat arrays plus per-event offsets.  The
+            # constant unit features are not stored at all - the loader
+            # reconstructs them - and voxel indices fit in int16 and
+            # MeV-scale energies in float16, cutting the bytes on disk
+            # and in the training input pipeline several-fold
+            arrays = {
+                'coords':   self.voxel_coords.astype(np.int16, copy=False),
+                'labels':   self.voxel_labels,
+                'energy':   self.voxel_energy.astype(np.float16, copy=False),
+                'edep_idxs':self.voxel_edep_idxs,
+                'offsets':  self.voxel_offsets,
+                'tiles':    tile_corners,
+                'tile_offsets': tile_offsets,
+            }
+            if compression == 'zstd':
+                # zstd at level 3 matches zlib's ratio at several times
+                # the throughput and compresses on all cores, so the
+                # arrays are streamed uncompressed through np.save into
+                # a single multi-threaded zstd stream instead of an
+                # in-memory zip buffer
+                try:
+                    import zstandard as zstd
+                except ImportError:
+                    self.logger.error("The 'zstandard' package is required for compression='zstd' but is not installed!")
+                    raise ImportError("The 'zstandard' package is required for compression='zstd' but is not installed!")
+                cctx = zstd.ZstdCompressor(level=3, threads=-1)
+                with zstd.open(output_file + '.zst', 'wb', cctx=cctx) as output:
+                    for array_name in self.unet_array_order:
+                        np.save(output, arrays[array_name])
+            else:
+                np.savez_compressed(output_file, **arrays)
         self.logger.info(f"Saved voxel dataset to {output_file}.")
\ No newline at end of file
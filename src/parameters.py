@@ -92,6 +92,7 @@ cluster_params = {
     'affinity':     {'damping': 0.5, 'max_iter': 200},
     'mean_shift':   {'bandwidth': None},
     'dbscan':       {'eps': 100.,'min_samples': 6},
+    'kdtree':       {'eps': 100.,'min_samples': 6},
     'optics':       {'min_samples': 6},
     'gaussian':     {'n_components': 1, 'covariance_type': 'full', 'tol': 1e-3, 'reg_covar': 1e-6, 'max_iter': 100}
 }